@@ -2,13 +2,28 @@
 
 SINGLE ENDPOINT:
 - All user input goes to flow_controller
+- /input/stream streams the narrative as server-sent events
+- /input reports a per-stage latency breakdown in the Server-Timing header
+  (the stream variant puts it on the final result event)
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
+import json
 import logging
+import os
+import resource
 
 from game.flow_controller import game_controller
+from game.ollama_client import ollama
+from game.llm_dispatcher import llm_waiting, llm_in_flight, llm_queue_wait
+from game.tracing import tracer
+from game.world_gen import world_generator
+from game.pathfinding import pathfinder
+from game.visibility import visibility
 
 logger = logging.getLogger(__name__)
 
@@ -18,25 +33,92 @@ router = APIRouter()
 class InputRequest(BaseModel):
     input: str
     selected_intent: str = None
+    session_id: Optional[str] = None  # Defaults to the shared default session
+    since_version: Optional[int] = None  # Last game_state version the client applied
+    state_epoch: Optional[str] = None
+
+def _ensure_session(session_id: Optional[str] = None) -> str:
+    """Create the session if it doesn't exist (simplified - no character creation)"""
+    session_id = session_id or "default_session"
+    if not game_controller.get_session(session_id):
+        game_controller.create_session("Pluto", session_id=session_id)
+    return session_id
+
+def _process_stats() -> dict:
+    """Resident memory of this process (for memory-per-session under load)"""
+    try:
+        with open("/proc/self/statm") as f:
+            rss_bytes = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        rss_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Peak, not current
+    return {"rss_bytes": rss_bytes, "active_sessions": len(game_controller.active_sessions)}
 
 # Single route - everything goes to flow_controller
 @router.post("/input")
 async def process_input(request: InputRequest):
     """Single route: all input goes to flow_controller"""
     try:
-        # Create session if none exists (simplified - no character creation)
-        session_id = "default_session"
-        if not game_controller.get_session(session_id):
-            game_controller.create_session("Pluto")
-            # Override with our default session_id
-            game_state = game_controller.active_sessions.pop(list(game_controller.active_sessions.keys())[-1])
-            game_controller.active_sessions[session_id] = game_state
-        
-        # Send everything to flow_controller
-        result = await game_controller.process_action(session_id, request.input, request.selected_intent)
-        return result
+        with tracer.span("POST /api/v1/input", root=True, kind="server") as span:
+            session_id = _ensure_session(request.session_id)
+            
+            # Send everything to flow_controller
+            result = await game_controller.process_action(
+                session_id, request.input, request.selected_intent,
+                request.since_version, request.state_epoch
+            )
+            with tracer.span("encode"):
+                body = jsonable_encoder(result)
+            return JSONResponse(body, headers={"Server-Timing": span.server_timing_header()})
         
     except Exception as e:
         logger.error(f"Error processing input: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/input/stream")
+async def process_input_stream(request: InputRequest):
+    """Streaming variant of /input: narrative tokens as SSE, then the full result"""
+    try:
+        session_id = _ensure_session(request.session_id)
+    except Exception as e:
+        logger.error(f"Error processing input: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def event_stream():
+        async for event in game_controller.process_action_stream(
+                session_id, request.input, request.selected_intent,
+                request.since_version, request.state_epoch):
+            yield f"data: {json.dumps(jsonable_encoder(event))}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def get_stats():
+    """Runtime counters for tuning the LLM pipeline"""
+    return {
+        "llm_cache": ollama.cache_stats(),
+        "llm_calls": ollama.call_stats(),
+        "llm_endpoints": ollama.router.stats(),
+        "interpretation": game_controller.get_interpretation_stats(),
+        "speculation": game_controller.get_speculation_stats(),
+        "world": world_generator.stats(),
+        "pathfinding": pathfinder.stats(),
+        "visibility": visibility.stats(),
+        "concurrency": {
+            **game_controller.get_concurrency_stats(),
+            "llm_max_concurrent_requests": ollama.max_concurrent_requests,
+            "llm_requests_waiting": llm_waiting.value(),
+            "llm_requests_in_flight": llm_in_flight.value(),
+            "llm_queue_wait_seconds": llm_queue_wait.samples().get((), {}),
+            "llm_dispatcher": ollama.dispatcher.stats()
+        },
+        "process": _process_stats()
+    }
+
+@router.get("/stats/calls")
+async def get_recent_calls(limit: int = 50):
+    """Most recent LLM call records (timings, tokens, cache, session)"""
+    return {"calls": ollama.recent_calls(limit)}
@@ -0,0 +1,177 @@
+"""database.py - SQLite Persistence for Game Sessions
+
+EXISTING SCHEMA:
+- game_sessions: one row per session, full GameState snapshot in world_state
+- characters: queryable mirror of the party (stats, equipment, wounds)
+- actions: append-only per-turn log (the full history; GameState keeps a ring buffer);
+  the player's words go in `action`, the interpreted intent in `intent`
+- Columns added to the table definitions since a database was created are
+  added to it on startup (SQLite ALTER TABLE ADD COLUMN)
+- Constructing a SessionRepository does not touch the database; tables are
+  created and migrated by initialize(), called from the app's startup hook
+
+SessionRepository is synchronous; callers on the event loop should run it
+in a worker thread (see game/session_store.py).
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import (
+    create_engine, Column, Integer, String, Boolean, DateTime, JSON, ForeignKey, func, delete, select, inspect, text
+)
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.path.join(os.path.dirname(__file__), "mythic_bastionlands.db")
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+
+Base = declarative_base()
+
+class GameSessionRecord(Base):
+    __tablename__ = "game_sessions"
+
+    id = Column(String, primary_key=True)
+    company_name = Column(String, nullable=False)
+    current_hex_x = Column(Integer)
+    current_hex_y = Column(Integer)
+    turn_count = Column(Integer)
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+    updated_at = Column(DateTime)
+    world_state = Column(JSON)
+    combat_state = Column(JSON)
+
+class CharacterRecord(Base):
+    __tablename__ = "characters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, ForeignKey("game_sessions.id"))
+    name = Column(String, nullable=False)
+    is_knight = Column(Boolean)
+    vigor = Column(Integer)
+    clarity = Column(Integer)
+    spirit = Column(Integer)
+    current_guard = Column(Integer)
+    max_guard = Column(Integer)
+    equipment = Column(JSON)
+    wounds = Column(JSON)
+
+class ActionRecord(Base):
+    __tablename__ = "actions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, ForeignKey("game_sessions.id"))
+    turn_number = Column(Integer)
+    timestamp = Column(DateTime, server_default=func.current_timestamp())
+    action = Column(String)
+    intent = Column(String)
+    leverage = Column(String)
+    cost = Column(String)
+    risk = Column(String)
+    success = Column(Boolean)
+    outcome = Column(String)
+    narrative = Column(String)
+
+class SessionRepository:
+    """Loads and saves GameState snapshots (see GameState.to_snapshot)"""
+
+    def __init__(self, database_url: str = DATABASE_URL):
+        self.engine = create_engine(database_url, connect_args={"check_same_thread": False})  # Connects lazily
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def initialize(self):
+        """Create missing tables and columns (run once at startup, not on import)"""
+        Base.metadata.create_all(self.engine)  # No-op for the existing tables
+        self._add_missing_columns()
+
+    def _add_missing_columns(self):
+        """Add columns defined above but missing from an older database"""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(self.engine.dialect)
+                        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                        logger.info(f"Added column {table.name}.{column.name}")
+
+    def save(self, snapshot: Dict[str, Any], actions: List[Dict[str, Any]] = ()):
+        """Upsert a session snapshot, mirror its characters and append new history entries"""
+        session_id = snapshot["session_id"]
+        characters = snapshot.get("characters", [])
+        position = snapshot.get("world_data", {}).get("position", {"q": 0, "r": 0})
+
+        with self.Session() as db:
+            record = db.get(GameSessionRecord, session_id)
+            if record is None:
+                record = GameSessionRecord(
+                    id=session_id,
+                    created_at=datetime.fromisoformat(snapshot["created_at"])
+                )
+                db.add(record)
+            record.company_name = characters[0]["name"] if characters else "Unknown"
+            record.current_hex_x = position["q"]
+            record.current_hex_y = position["r"]
+            record.turn_count = snapshot.get("game_data", {}).get("turn_count", 0)
+            record.updated_at = datetime.now()
+            record.world_state = snapshot
+
+            db.execute(delete(CharacterRecord).where(CharacterRecord.session_id == session_id))
+            for character in characters:
+                db.add(CharacterRecord(
+                    session_id=session_id,
+                    name=character["name"],
+                    is_knight=bool(character.get("player_party")),
+                    vigor=character["vigour"],
+                    clarity=character["clarity"],
+                    spirit=character["spirit"],
+                    current_guard=character["guard"],
+                    max_guard=character["full_guard"],
+                    equipment=character.get("inventory", []),
+                    wounds=character.get("status", {})
+                ))
+            
+            for entry in actions:
+                db.add(ActionRecord(
+                    session_id=session_id,
+                    turn_number=entry["turn"],
+                    timestamp=datetime.fromisoformat(entry["timestamp"]),
+                    action=entry["action"],
+                    intent=entry.get("intent", ""),
+                    narrative=entry["result"]
+                ))
+            db.commit()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a session snapshot, or None if it was never saved"""
+        with self.Session() as db:
+            record = db.get(GameSessionRecord, session_id)
+            if record is None or not record.world_state:
+                return None
+            return record.world_state
+
+    def load_actions(self, session_id: str, since_turn: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Read back logged turns, oldest first"""
+        with self.Session() as db:
+            rows = db.scalars(
+                select(ActionRecord)
+                .where(ActionRecord.session_id == session_id, ActionRecord.turn_number > since_turn)
+                .order_by(ActionRecord.turn_number)
+                .limit(limit)
+            )
+            return [{
+                "turn": row.turn_number,
+                "action": row.action,
+                "intent": row.intent,
+                "result": row.narrative,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None
+            } for row in rows]
+    
+    def list_session_ids(self) -> List[str]:
+        """All persisted session ids"""
+        with self.Session() as db:
+            return list(db.scalars(select(GameSessionRecord.id)))
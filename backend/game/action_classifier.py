@@ -0,0 +1,135 @@
+"""action_classifier.py - Rule-Based Action Pre-Classifier
+
+LOCAL FAST PATH:
+- Resolves obvious inputs ("rest", "check status", "move to 1,2") without the LLM
+- Phrase trie over handler keywords + regex movement patterns
+- Returns a confidence so unclear inputs still go to the action_interpreter
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+# Movement commands, most specific first (shared with the flow controller)
+MOVEMENT_PATTERNS = [
+    r'move to.*?(-?\d+)[,\s]+(-?\d+)',
+    r'go to.*?(-?\d+)[,\s]+(-?\d+)',
+    r'travel to.*?(-?\d+)[,\s]+(-?\d+)',
+    r'hex.*?(-?\d+)[,\s]+(-?\d+)',
+    r'(-?\d+)[,\s]+(-?\d+)'  # Just coordinates
+]
+_COMPILED_MOVEMENT = [re.compile(p) for p in MOVEMENT_PATTERNS]
+_BARE_COORDINATES = re.compile(r'\(?\s*-?\d+\s*[,\s]\s*-?\d+\s*\)?')
+
+# Phrases that map straight onto an action handler
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "rest": ["rest", "sleep", "make camp", "camp", "take a break", "recover", "rest here"],
+    "check": ["check status", "check stats", "status", "stats", "check inventory", "inventory",
+              "check myself", "how am i"],
+    "explore": ["explore", "explore the area", "explore this area", "look around", "search",
+                "search the area", "scout", "investigate", "investigate further"],
+    "travel": ["travel", "continue traveling", "continue travelling", "journey on", "move on",
+               "keep going"],
+    "interact": ["talk", "talk to", "speak", "speak to", "speak with", "ask", "greet", "interact"],
+}
+
+RISK_LEVELS = {
+    "rest": "low",
+    "check": "low",
+    "explore": "medium",
+    "travel": "medium",
+    "interact": "low",
+    "movement": "low",
+}
+
+_TOKEN = re.compile(r"[a-z']+")
+
+class RuleBasedClassifier:
+    """Deterministic classifier for unambiguous player inputs"""
+
+    def __init__(self, keywords: Dict[str, List[str]] = None, confidence_threshold: float = 0.75):
+        self.confidence_threshold = confidence_threshold
+        self._trie: Dict[str, Any] = {}
+        for intent, phrases in (keywords or INTENT_KEYWORDS).items():
+            for phrase in phrases:
+                self.add_phrase(phrase, intent)
+
+    def add_phrase(self, phrase: str, intent: str):
+        """Register a keyword phrase for an intent"""
+        node = self._trie
+        for token in _TOKEN.findall(phrase.lower()):
+            node = node.setdefault(token, {})
+        node["$intent"] = intent
+
+    def _longest_match(self, tokens: List[str], start: int) -> Tuple[Optional[str], int]:
+        """Longest phrase in the trie starting at tokens[start] -> (intent, length)"""
+        node = self._trie
+        best: Tuple[Optional[str], int] = (None, 0)
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if "$intent" in node:
+                best = (node["$intent"], i - start + 1)
+        return best
+
+    def classify(self, player_input: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Classify input -> (action_data, confidence); action_data is None when nothing matched"""
+        text = player_input.strip().lower()
+        if not text:
+            return None, 0.0
+
+        # Movement: explicit verbs are unambiguous, bare coordinates only if that's all there is
+        for index, pattern in enumerate(_COMPILED_MOVEMENT):
+            if pattern.search(text):
+                if index < len(_COMPILED_MOVEMENT) - 1:
+                    confidence = 0.95
+                elif _BARE_COORDINATES.fullmatch(text):
+                    confidence = 0.9
+                else:
+                    confidence = 0.5
+                return self._action_data("movement", player_input), confidence
+
+        tokens = _TOKEN.findall(text)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            intent, length = self._longest_match(tokens, i)
+            if intent:
+                matches.append((i, intent, length))
+                i += length
+            else:
+                i += 1
+
+        if not matches:
+            return None, 0.0
+
+        intents = {intent for _, intent, _ in matches}
+        first_pos, intent, length = matches[0]
+        if len(intents) > 1:
+            confidence = 0.4  # Mixed signals, e.g. "rest then explore"
+        elif first_pos == 0 and len(tokens) - length <= 2:
+            confidence = 0.95  # The whole input is (almost) just the command
+        elif first_pos == 0:
+            confidence = 0.8
+        else:
+            confidence = 0.6
+        return self._action_data(intent, player_input), confidence
+
+    def resolve(self, player_input: str) -> Optional[Dict[str, Any]]:
+        """Action data if the input is confidently classified, otherwise None"""
+        action_data, confidence = self.classify(player_input)
+        if action_data and confidence >= self.confidence_threshold:
+            action_data["confidence"] = confidence
+            return action_data
+        return None
+
+    def _action_data(self, intent: str, player_input: str) -> Dict[str, Any]:
+        """Build the same shape of action data the action_interpreter returns"""
+        return {
+            "intent": intent,
+            "player_input": player_input,
+            "risk_level": RISK_LEVELS.get(intent, "low"),
+            "mechanics": [],
+            "needs_roll": False,
+            "source": "rules"
+        }
@@ -0,0 +1,121 @@
+"""context_builder.py - Incremental Game Context for Prompts
+
+CACHED SECTIONS:
+- Context is assembled from independent sections (character, location, memory, ...)
+- Each section is cached on the GameState, keyed on the section versions it reads
+- Only sections whose inputs changed (see GameState.touch) are rebuilt
+
+TOKEN BUDGET:
+- Sections are admitted in priority order until the estimated budget is spent
+- Output keeps a stable section order so prompt prefixes stay cache-friendly
+"""
+
+from typing import Dict, Callable, List, Optional, Tuple
+
+from models import GameState
+from game.metrics import metrics
+
+sections_built = metrics.counter("context_sections_built", "Context sections rebuilt", ("section",))
+sections_reused = metrics.counter("context_sections_reused", "Context sections served from cache", ("section",))
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)"""
+    return len(text) // 4 + 1 if text else 0
+
+class GameContextBuilder:
+    """Builds the prompt context string from cached per-section fragments"""
+
+    def __init__(self, recent_actions: int = 3, nearby_radius: int = 2):
+        self.recent_actions = recent_actions
+        self.nearby_radius = nearby_radius
+
+        # name -> (GameState sections it depends on, builder); listed in output order
+        self.sections: Dict[str, Tuple[Tuple[str, ...], Callable[[GameState], str]]] = {
+            "character": (("character",), self._build_character),
+            "location": (("location", "hexes"), self._build_location),
+            "nearby": (("location", "hexes", "npcs"), self._build_nearby),
+            "memory": (("history",), self._build_memory),
+            "recent": (("history",), self._build_recent),
+        }
+        # Which sections survive first when the token budget is tight
+        self.priority: List[str] = ["character", "location", "recent", "memory", "nearby"]
+
+    def section(self, game_state: GameState, name: str) -> str:
+        """One section's text, rebuilt only if its inputs changed"""
+        depends_on, build = self.sections[name]
+        key = tuple(game_state.section_versions.get(dep, 0) for dep in depends_on)
+
+        cached = game_state.context_cache.get(name)
+        if cached and cached[0] == key:
+            sections_reused.inc(section=name)
+            return cached[1]
+
+        text = build(game_state)
+        game_state.context_cache[name] = (key, text)
+        sections_built.inc(section=name)
+        return text
+
+    def build(self, game_state: GameState, token_budget: Optional[int] = None) -> str:
+        """Assemble the context, dropping low-priority sections past token_budget"""
+        texts = {name: self.section(game_state, name) for name in self.sections}
+
+        if token_budget is not None:
+            admitted, spent = set(), 0
+            for name in self.priority:
+                cost = estimate_tokens(texts[name])
+                if cost and spent + cost <= token_budget:
+                    admitted.add(name)
+                    spent += cost
+            texts = {name: text for name, text in texts.items() if name in admitted}
+
+        return "\n".join(text for text in texts.values() if text)
+
+    # Section builders
+
+    def _build_character(self, game_state: GameState) -> str:
+        main_char = game_state.get_main_character()
+        if not main_char:
+            return ""
+        lines = [
+            f"Character: {main_char.name}",
+            f"Stats: vigour {main_char.vigour}/{main_char.full_vigour}, "
+            f"clarity {main_char.clarity}/{main_char.full_clarity}, "
+            f"spirit {main_char.spirit}/{main_char.full_spirit}, "
+            f"guard {main_char.guard}/{main_char.full_guard}"
+        ]
+        if main_char.fatigued:
+            lines.append("Condition: fatigued")
+        if main_char.inventory:
+            lines.append(f"Inventory: {', '.join(main_char.inventory)}")
+        return "\n".join(lines)
+
+    def _build_location(self, game_state: GameState) -> str:
+        location = game_state.world_data.get("current_location")
+        q, r = game_state.get_current_position()
+        hex_obj = game_state.get_hex(q, r)
+        parts = []
+        if location:
+            parts.append(location)
+        if hex_obj and hex_obj.landscape not in ("unexplored", "unknown"):
+            parts.append(hex_obj.landscape.replace("_", " "))
+        if not parts:
+            return ""
+        return f"Location: {', '.join(parts)} (hex {q},{r})"
+
+    def _build_nearby(self, game_state: GameState) -> str:
+        q, r = game_state.get_current_position()
+        features = []
+        for feature in game_state.features_near(self.nearby_radius):
+            name = f"omen of {feature.name}" if feature.kind == "omen" else feature.name
+            where = "here" if (feature.q, feature.r) == (q, r) else f"at {feature.q},{feature.r}"
+            features.append(f"{name} {where}")
+        return f"Nearby: {'; '.join(features)}" if features else ""
+
+    def _build_memory(self, game_state: GameState) -> str:
+        return f"Earlier: {game_state.history_summary}" if game_state.history_summary else ""
+
+    def _build_recent(self, game_state: GameState) -> str:
+        recent = game_state.recent_history(self.recent_actions)
+        if not recent:
+            return ""
+        return f"Recent: {' → '.join(h['action'] for h in recent)}"
@@ -5,27 +5,97 @@ GAME FLOW CONTROL:
 - Handles player actions and responses
 - Coordinates between different game systems
 - Easy to extend with new mechanics
+- Optional token streaming of narrative to the API layer
+- Sessions persisted to SQLite via a write-behind SessionStore
+- Old history rolled into an LLM-written summary in the background
+- Turns for the same session are serialised; different sessions run in parallel
+- Narratives for the offered options are pre-generated while the player reads
+- Each turn stage is traced (game/tracing.py) for Server-Timing and trace export
+- Terrain is generated from the world seed as it comes into the party's line
+  of sight; each turn reports the hexes it revealed
+- Movement to any hex follows a planned route (game/pathfinding.py)
 """
 
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator, Awaitable, Callable
+from contextvars import ContextVar
+import asyncio
+import copy
+import time
 import uuid
-import json
 import logging
+import random
 import re
-from models import GameState, Character, create_new_game, Hex
+from models import GameState, Character, create_new_game, Hex, HexMap, hex_distance
 from backend.game.dice_roller import roll_dice
-from game.ollama_client import ollama
+from game.ollama_client import ollama, call_session
+from game.llm_dispatcher import request_priority, SPECULATIVE, BACKGROUND
+from game.action_classifier import RuleBasedClassifier, MOVEMENT_PATTERNS
+from game.session_store import SessionStore
+from game.metrics import metrics
+from game.tracing import tracer
+from game.pathfinding import pathfinder, Route, MAX_TRAVEL_DISTANCE
+from game.visibility import visibility
+from database import SessionRepository
 
 logger = logging.getLogger(__name__)
 
+# Evicted history entries to collect before asking the chronicler for a new summary
+SUMMARY_BATCH = 10
+
+# Handler result fields passed through to the turn response as they are
+TURN_RESULT_FIELDS = ("route", "travel_cost", "revealed")
+
+# Where narrative tokens go while a streaming turn is being processed (unset = buffered)
+TokenSink = Callable[[str], Awaitable[None]]
+_token_sink: ContextVar[Optional[TokenSink]] = ContextVar("token_sink", default=None)
+
+# Whether the current task is a speculative turn (the session itself is in call_session)
+_speculating: ContextVar[bool] = ContextVar("speculating", default=False)
+
+NarrationKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+session_wait = metrics.histogram("session_lock_wait_seconds", "Time a turn waited for its session lock")
+session_queue_depth = metrics.gauge("session_queue_depth", "Turns queued behind another turn of the same session")
+turns_in_progress = metrics.gauge("turns_in_progress", "Turns currently being processed")
+speculations = metrics.counter("speculative_narrations", "Speculative narrations by outcome", ("outcome",))
+
 class GameFlowController:
     """Controls the flow of the game"""
     
-    def __init__(self):
-        self.active_sessions: Dict[str, GameState] = {}
+    def __init__(self, repository: Optional[SessionRepository] = None, speculation_width: int = 2,
+                 max_speculative_tasks: int = 4):
+        self.sessions = SessionStore(repository)
         self.action_handlers = {}
+        self.classifier = RuleBasedClassifier()
+        self.interpretation_stats = {"rule_based": 0, "model": 0}
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_waiters: Dict[str, int] = {}
+        
+        # Speculation: top options per turn, global cap on background generations
+        self.speculation_width = speculation_width
+        self.max_speculative_tasks = max_speculative_tasks
+        # session -> option -> task (None once finished: its narrations are in _speculations)
+        self._speculative_tasks: Dict[str, Dict[str, Optional[asyncio.Task]]] = {}
+        self._speculations: Dict[str, Dict[NarrationKey, asyncio.Future]] = {}  # session -> narration
+        self.sessions.on_evict.append(self._forget_speculation)
         self._setup_default_handlers()
     
+    @property
+    def active_sessions(self) -> Dict[str, GameState]:
+        """Sessions currently held in memory"""
+        return self.sessions.sessions
+    
+    def start(self):
+        """Start background persistence (call once the event loop is running)"""
+        self.sessions.start()
+    
+    async def shutdown(self):
+        """Flush all pending session state to the database"""
+        for session_id in list(self._speculative_tasks):
+            self._cancel_speculation(session_id)
+        await self.sessions.stop()
+    
     def _setup_default_handlers(self):
         """Setup default action handlers"""
         self.action_handlers.update({
@@ -38,9 +108,57 @@ class GameFlowController:
             # "inventory": self._handle_inventory,   # inventory management should not include language model
         })
     
-    async def process_action(self, session_id: str, player_input: str, selected_intent: str = None) -> Dict[str, Any]:
-        """Process a player action and return the result"""
+    async def process_action(self, session_id: str, player_input: str, selected_intent: str = None,
+                             since_version: Optional[int] = None, state_epoch: Optional[str] = None) -> Dict[str, Any]:
+        """Process a player action and return the result
+
+        Turns for one session run one at a time in arrival order, so they never
+        interleave on recent_user_intent, history or world_data.
+
+        game_state in the response is a delta against the client's since_version
+        (see GameState.delta_since), or a full snapshot when the client is too far behind.
+        """
+        # Background work for options the player did not pick is now wasted
+        self._cancel_speculation(session_id, keep=player_input)
+        
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        self._session_waiters[session_id] = self._session_waiters.get(session_id, 0) + 1
+        if lock.locked():
+            session_queue_depth.inc()
+            queued = True
+        else:
+            queued = False
+        
+        start = time.perf_counter()
+        try:
+            # Held from arrival: a queued or running turn must not lose its session to eviction
+            with self.sessions.hold(session_id), tracer.span("process_action", session_id=session_id):
+                lock_span = tracer.start_span("session_lock")
+                async with lock:
+                    tracer.end_span(lock_span)
+                    if queued:
+                        session_queue_depth.dec()
+                        queued = False
+                    session_wait.observe(time.perf_counter() - start)
+                    turns_in_progress.inc()
+                    try:
+                        return await self._process_turn(session_id, player_input, selected_intent,
+                                                        since_version, state_epoch)
+                    finally:
+                        turns_in_progress.dec()
+        finally:
+            if queued:  # Cancelled while waiting
+                session_queue_depth.dec()
+            self._session_waiters[session_id] -= 1
+            if not self._session_waiters[session_id]:
+                del self._session_waiters[session_id]
+                self._session_locks.pop(session_id, None)
+    
+    async def _process_turn(self, session_id: str, player_input: str, selected_intent: str,
+                            since_version: Optional[int], state_epoch: Optional[str]) -> Dict[str, Any]:
+        """One turn of process_action, run while holding the session lock"""
         logger.info(f"Processing action for session {session_id}: '{player_input}' with intent: {selected_intent}")
+        call_session.set(session_id)
         
         game_state = self.get_session(session_id)
         if not game_state:
@@ -55,6 +173,7 @@ class GameFlowController:
         if selected_intent:    # when button pressed, update recent user intent
             # update game state
             game_state.recent_user_intent = selected_intent
+            self.sessions.mark_dirty(session_id)
             return {}
         elif game_state.recent_user_intent:
             selected_intent = game_state.recent_user_intent
@@ -64,35 +183,49 @@ class GameFlowController:
             # Step 1: Interpret the player's action
             if not selected_intent:
                 logger.debug("Interpreting player action")
-                action_data = await self._interpret_action(game_state, player_input)
+                with tracer.span("interpret") as span:
+                    action_data = await self._interpret_action(game_state, player_input)
+                    span.set_attribute("source", action_data.get("source", "model"))
             
             # Step 2: Execute the action
             logger.debug("Executing action")
-            result = await self._execute_action(game_state, action_data)
+            with tracer.span("execute", intent=str(action_data.get("intent", ""))):
+                result = await self._execute_action(game_state, action_data)
+            
+            # A rejected action (e.g. an impossible move) is not a turn: nothing to record
+            if "error" in result:
+                return {"error": result["error"], "session_id": session_id, "action_data": action_data}
 
             # TODO if combat? 
             
             # Step 3: Update game state
             logger.debug("Step 3: Updating game state")
-            game_state.add_history_entry(
-                action=player_input,
-                result=result.get("narrative", ""),
-                context=action_data
-            )
-            turn_count = game_state.game_data.get("turn_count", 0) + 1
+            with tracer.span("history"):
+                game_state.add_history_entry(
+                    action=player_input,
+                    result=result.get("narrative", ""),
+                    context=action_data
+                )
+                game_state.game_data["turn_count"] = game_state.game_data.get("turn_count", 0) + 1
+                game_state.commit_version()
             
             # Step 4: Generate API response
             logger.debug("Step 4: Generating response")
-            response = {
-                "session_id": session_id,
-                "narrative": result.get("narrative", ""),
-                "game_state": game_state.to_dict(),
-                "options": result.get("options", []),
-                "action_data": action_data
-            }
+            with tracer.span("serialize"):
+                response = {
+                    "session_id": session_id,
+                    "narrative": result.get("narrative", ""),
+                    "game_state": game_state.delta_since(since_version, state_epoch),
+                    "options": result.get("options", []),
+                    "action_data": action_data
+                }
+                response.update({key: result[key] for key in TURN_RESULT_FIELDS if key in result})
             
             logger.info(f"Action processing completed successfully for session {session_id}")
             game_state.recent_user_intent = None
+            self.sessions.mark_dirty(session_id)
+            self._schedule_summary(game_state)
+            self._schedule_speculation(game_state, response["options"])
 
             # TODO move to next phase
 
@@ -105,39 +238,254 @@ class GameFlowController:
                 "session_id": session_id
             }
     
+    async def process_action_stream(self, session_id: str, player_input: str, selected_intent: str = None,
+                                    since_version: Optional[int] = None,
+                                    state_epoch: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process a player action, yielding narrative tokens before the final result
+
+        Yields {"type": "token", "text": ...} events while the handler narrates,
+        then a single {"type": "result", ...} event carrying the normal response.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def sink(token: str):
+            await queue.put({"type": "token", "text": token})
+
+        async def run():
+            _token_sink.set(sink)
+            with tracer.span("process_action_stream", root=True, kind="server") as span:
+                try:
+                    result = await self.process_action(session_id, player_input, selected_intent,
+                                                       since_version, state_epoch)
+                except Exception as e:
+                    result = {"error": f"Error processing action: {str(e)}", "session_id": session_id}
+            # Headers are long gone by now, so the breakdown rides on the result event
+            await queue.put({"type": "result", **result, "server_timing": span.server_timing()})
+
+        # The turn runs to completion even if the client disconnects mid-stream
+        task = asyncio.create_task(run())
+        while True:
+            event = await queue.get()
+            yield event
+            if event["type"] == "result":
+                break
+        await task
+    
+    async def _emit(self, text: str):
+        """Forward narrative text to the streaming client, if any"""
+        sink = _token_sink.get()
+        if sink:
+            await sink(text)
+    
+    async def _narrate(self, template_name: str, **kwargs) -> str:
+        """Generate narrative text, streaming tokens when a sink is active
+
+        Served from a matching speculative narration when one exists; the key is
+        the full set of template arguments, so any change in context misses.
+        """
+        session_id = call_session.get()
+        key = (template_name, tuple(sorted(kwargs.items())))
+        
+        if _speculating.get():
+            return await self._speculate_narration(session_id, key, template_name, kwargs)
+        
+        sink = _token_sink.get()
+        speculated = self._speculations.get(session_id, {}).pop(key, None)
+        if speculated is not None and not speculated.cancelled():
+            try:
+                narrative = await asyncio.shield(speculated)
+            except asyncio.CancelledError:
+                if not speculated.cancelled():
+                    raise  # This turn itself was cancelled
+                narrative = None
+            except Exception:
+                narrative = None
+            if narrative is not None:
+                speculations.inc(outcome="hit")
+                template_args = {name: value for name, value in kwargs.items() if name != "session_id"}
+                ollama.remember_exchange(template_name, kwargs.get("session_id"), narrative, **template_args)
+                if sink:
+                    await sink(narrative)
+                return narrative
+        
+        if not sink:
+            return await ollama.generate(template_name, **kwargs)
+        
+        parts = []
+        async for token in ollama.generate_stream(template_name, **kwargs):
+            parts.append(token)
+            await sink(token)
+        return "".join(parts)
+    
+    async def _speculate_narration(self, session_id: str, key: NarrationKey, template_name: str,
+                                   kwargs: Dict[str, Any]) -> str:
+        """Generate a narration in the background and publish it for the next turn"""
+        store = self._speculations.setdefault(session_id, {})
+        future = store.get(key)
+        if future is not None:  # Two options led to the same prompt
+            return await asyncio.shield(future)
+        
+        future = asyncio.get_running_loop().create_future()
+        store[key] = future
+        try:
+            narrative = await ollama.generate(template_name, remember=False, **kwargs)
+        except BaseException:
+            future.cancel()
+            if store.get(key) is future:
+                del store[key]
+            raise
+        future.set_result(narrative)
+        return narrative
+    
+    def _schedule_speculation(self, game_state: GameState, options: List[str]):
+        """Pre-generate narratives for the top options while the player decides
+
+        Each option is classified locally and its handler run against a throwaway
+        copy of the state; only the narrations are kept. Options the rules can't
+        classify would need a model call just to interpret, so they are skipped.
+        """
+        session_id = game_state.session_id
+        self._cancel_speculation(session_id)
+        tasks = self._speculative_tasks.setdefault(session_id, {})
+        
+        for option in options[:self.speculation_width]:
+            if self._running_speculations() >= self.max_speculative_tasks:
+                speculations.inc(outcome="over_budget")
+                break
+            action_data = self.classifier.resolve(option)
+            if not action_data:
+                continue
+            scratch = GameState.from_snapshot(copy.deepcopy(game_state.to_snapshot()))
+            task = asyncio.create_task(self._speculate(scratch, action_data))
+            key = self._option_key(option)
+            tasks[key] = task
+            task.add_done_callback(lambda done, key=key: self._speculation_done(session_id, key, done))
+            speculations.inc(outcome="started")
+    
+    async def _speculate(self, scratch: GameState, action_data: Dict[str, Any]):
+        """Run one option's handler on a scratch state with narration captured"""
+        _token_sink.set(None)
+        call_session.set(scratch.session_id)
+        _speculating.set(True)
+        request_priority.set(SPECULATIVE)
+        try:
+            with tracer.span("speculate", root=True, option=str(action_data.get("player_input", ""))):
+                await self._execute_action(scratch, action_data)
+        except asyncio.CancelledError:
+            speculations.inc(outcome="cancelled")
+            raise
+        except Exception as e:
+            logger.debug(f"Speculation for '{action_data.get('player_input')}' failed: {e}")
+    
+    def _cancel_speculation(self, session_id: str, keep: Optional[str] = None):
+        """Cancel a session's speculative work, except the option matching `keep`
+
+        Finished narrations of the kept option stay available to the next turn;
+        everything else is dropped.
+        """
+        tasks = self._speculative_tasks.pop(session_id, {})
+        kept_key = self._option_key(keep) if keep else None
+        for key, task in tasks.items():
+            if key != kept_key and task is not None:
+                task.cancel()
+        if kept_key in tasks:
+            self._speculative_tasks[session_id] = {kept_key: tasks[kept_key]}
+        else:
+            self._speculations.pop(session_id, None)
+    
+    def _speculation_done(self, session_id: str, key: str, task: asyncio.Task):
+        """Drop a finished speculative task; its narrations stay published"""
+        tasks = self._speculative_tasks.get(session_id)
+        if tasks is not None and tasks.get(key) is task:
+            tasks[key] = None
+    
+    def _forget_speculation(self, session_id: str):
+        """Cancel and drop all speculative state of a session leaving memory"""
+        self._cancel_speculation(session_id)
+        self._speculative_tasks.pop(session_id, None)
+    
+    def _running_speculations(self) -> int:
+        return sum(1 for tasks in self._speculative_tasks.values() for task in tasks.values()
+                   if task is not None and not task.done())
+    
+    @staticmethod
+    def _option_key(option: str) -> str:
+        return " ".join(option.lower().split())
+    
+    def get_speculation_stats(self) -> Dict[str, Any]:
+        """Speculative narration outcomes and current load"""
+        return {
+            "running": self._running_speculations(),
+            "max_speculative_tasks": self.max_speculative_tasks,
+            **{",".join(key): value for key, value in speculations.samples().items()}
+        }
+    
+    def _schedule_summary(self, game_state: GameState):
+        """Roll evicted history into the summary once enough has built up"""
+        session_id = game_state.session_id
+        if len(game_state.summary_backlog) < SUMMARY_BATCH or session_id in self._summary_tasks:
+            return
+        task = asyncio.create_task(self._summarize_history(game_state))
+        self._summary_tasks[session_id] = task
+        task.add_done_callback(lambda _: self._summary_tasks.pop(session_id, None))
+    
+    async def _summarize_history(self, game_state: GameState):
+        """Ask the chronicler to fold the summary backlog into history_summary"""
+        request_priority.set(BACKGROUND)  # Runs in its own task
+        call_session.set(game_state.session_id)
+        batch = game_state.summary_backlog[:SUMMARY_BATCH]  # Same prompt size however far behind
+        events = "\n".join(f"- {entry['action']}: {entry['result'][:200]}" for entry in batch)
+        try:
+            with self.sessions.hold(game_state.session_id), \
+                    tracer.span("summarize_history", root=True, session_id=game_state.session_id):
+                summary = await ollama.generate(
+                    "chronicler",
+                    fallback=False,  # Error or canned text must never replace the chronicle
+                    summary=game_state.history_summary or "(nothing yet)",
+                    events=events
+                )
+        except Exception as e:
+            # Backlog and summary stay as they were; the next turn schedules a retry
+            logger.error(f"History summary failed for session {game_state.session_id}: {e}")
+            return
+        
+        game_state.history_summary = summary.strip()
+        game_state.touch("history")
+        # New evictions may have arrived (and pushed old ones out) while the model was busy
+        summarised = {id(entry) for entry in batch}
+        game_state.summary_backlog[:] = [e for e in game_state.summary_backlog if id(e) not in summarised]
+        self.sessions.mark_dirty(game_state.session_id)
+        logger.info(f"Summarised {len(batch)} turns for session {game_state.session_id}")
+    
     async def _interpret_action(self, game_state: GameState, player_input: str) -> Dict[str, Any]:
         """Interpret what the player wants to do"""
         
+        # Obvious commands are resolved locally without a model round-trip
+        action_data = self.classifier.resolve(player_input)
+        if action_data:
+            self.interpretation_stats["rule_based"] += 1
+            logger.debug(f"Rule-based interpretation: {action_data['intent']} ({action_data['confidence']:.2f})")
+            return action_data
+        self.interpretation_stats["model"] += 1
+        
         # Build context for the AI
         context = ollama.build_game_context(game_state)
 
-        # Use AI to interpret the action
+        # Use AI to interpret the action (schema-constrained, see game/schemas.py)
         try:
-            response = await ollama.generate(
+            interpretation = await ollama.generate_structured(
                 "action_interpreter",
                 situation=context,
                 player_input=player_input
             )
-            
-            # Try to parse as JSON
-            try:
-                action_data = json.loads(response)
-            except json.JSONDecodeError:
-                # Fallback to simple interpretation
-                logger.error(f"Error interpreting action: {response}", exc_info=True)
-                action_data = {
-                    "player_input": player_input,
-                    "risk_level": "low",
-                    "mechanics": [],
-                    "needs_roll": False
-                }
-            
-            return action_data
+            return {**interpretation.model_dump(), "player_input": player_input, "source": "model"}
             
         except Exception as e:
             # Fallback interpretation
+            logger.error(f"Error interpreting action '{player_input}': {e}")
             return {
                 "intent": player_input,
+                "player_input": player_input,
                 "risk_level": "unknown",
                 "mechanics": [],
                 "needs_roll": False,
@@ -166,7 +514,7 @@ class GameFlowController:
         # Generate a location or encounter
         context = ollama.build_game_context(game_state)
         
-        narrative = await ollama.generate(
+        narrative = await self._narrate(
             "world_builder",
             location_type="mysterious location",
             context=context
@@ -192,12 +540,15 @@ class GameFlowController:
         new_location = f"New Area #{len(game_state.world_data.get('discovered_areas', [])) + 1}"
         
         game_state.world_data["current_location"] = new_location
+        game_state.touch("location")
         
         narrative = f"You travel from {current} to {new_location}. The landscape changes around you..."
         
+        await self._emit(f"{narrative}\n\n")
+        
         # Use AI to describe the new area
         context = ollama.build_game_context(game_state)
-        description = await ollama.generate(
+        description = await self._narrate(
             "world_builder",
             location_type="travel destination",
             context=context
@@ -218,6 +569,7 @@ class GameFlowController:
             main_char.vigour = min(main_char.vigour + 2, main_char.full_vigour)
             main_char.clarity = min(main_char.clarity + 2, main_char.full_clarity)
             main_char.spirit = min(main_char.spirit + 2, main_char.full_spirit)
+            game_state.touch("character")
         
         narrative = "You rest and recover your strength. Your vitality and clarity improve."
         
@@ -230,10 +582,12 @@ class GameFlowController:
         
         context = ollama.build_game_context(game_state)
         
-        narrative = await ollama.generate(
+        narrative = await self._narrate(
             "gamemaster",
+            session_id=game_state.session_id,
             game_state=context,
-            player_action=action_data.get("intent", "interact with something")
+            player_action=action_data.get("player_input") or action_data.get("intent", "interact with something"),
+            player_intent=action_data.get("intent", "interact")
         )
         
         return {
@@ -292,8 +646,9 @@ class GameFlowController:
         
         context = ollama.build_game_context(game_state)
         
-        narrative = await ollama.generate(
+        narrative = await self._narrate(
             "gamemaster",
+            session_id=game_state.session_id,
             game_state=context,
             player_intent=action_data.get("intent", "do something"),
             player_action = action_data.get("player_input", "")
@@ -304,6 +659,23 @@ class GameFlowController:
             "options": ["Continue", "Eat shit", "Chase ass"]
         }
     
+    def get_concurrency_stats(self) -> Dict[str, Any]:
+        """Queueing of turns behind their session locks"""
+        return {
+            "sessions_with_turns": len(self._session_locks),
+            "queued_turns": session_queue_depth.value(),
+            "turns_in_progress": turns_in_progress.value(),
+            "lock_wait_seconds": session_wait.samples().get((), {})
+        }
+    
+    def get_interpretation_stats(self) -> Dict[str, Any]:
+        """How many interpretations skipped the model"""
+        total = self.interpretation_stats["rule_based"] + self.interpretation_stats["model"]
+        return {
+            **self.interpretation_stats,
+            "skip_rate": self.interpretation_stats["rule_based"] / total if total else 0.0
+        }
+    
     def add_action_handler(self, action_type: str, handler_func):
         """Add a custom action handler"""
         self.action_handlers[action_type] = handler_func
@@ -321,46 +693,42 @@ class GameFlowController:
             for session_id, state in self.active_sessions.items()
         ]
 
-    def create_session(self, character_name: str) -> str:
+    def create_session(self, character_name: str, session_id: Optional[str] = None) -> str:
         """Create a new game session"""
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
         game_state = create_new_game(session_id, character_name, description="New Player Character")
-        self.active_sessions[session_id] = game_state
+        self._open_start(game_state)
+        visibility.update(game_state)
+        self.sessions.put(session_id, game_state)
         logger.info(
             f"Created new session {session_id} for character '{character_name}', total sessions: {len(self.active_sessions)}")
         return session_id
 
+    def _open_start(self, game_state: GameState, radius: int = 3, attempts: int = 32):
+        """Reroll the world seed until the starting hex is not walled in by lakes or peaks"""
+        start = game_state.get_current_position()
+        needed = len(HexMap.range(*start, radius)) // 2
+        for _ in range(attempts):
+            if len(pathfinder.distance_field(game_state, start, radius).costs) >= needed:
+                return
+            game_state.world_data["world_seed"] = random.getrandbits(32)
+            game_state.touch("terrain")
+
     def get_session(self, session_id: str) -> Optional[GameState]:
         """Get a game session"""
         logger.debug(f"Looking for session {session_id}, available sessions: {list(self.active_sessions.keys())}")
-        return self.active_sessions.get(session_id)
+        return self.sessions.get(session_id)
 
     def _detect_movement_intent(self, player_input: str) -> bool:
         """Detect if player input is a movement command"""
-        movement_patterns = [
-            r'move to.*?(\d+)[,\s]+(\d+)',
-            r'go to.*?(\d+)[,\s]+(\d+)', 
-            r'travel to.*?(\d+)[,\s]+(\d+)',
-            r'hex.*?(\d+)[,\s]+(\d+)',
-            r'(\d+)[,\s]+(\d+)'  # Just coordinates
-        ]
-        
-        for pattern in movement_patterns:
+        for pattern in MOVEMENT_PATTERNS:
             if re.search(pattern, player_input.lower()):
                 return True
         return False
     
     def _parse_hex_coordinates(self, player_input: str) -> Optional[Tuple[int, int]]:
         """Extract hex coordinates from player input"""
-        patterns = [
-            r'move to.*?(\d+)[,\s]+(\d+)',
-            r'go to.*?(\d+)[,\s]+(\d+)', 
-            r'travel to.*?(\d+)[,\s]+(\d+)',
-            r'hex.*?(\d+)[,\s]+(\d+)',
-            r'(\d+)[,\s]+(\d+)'  # Just coordinates
-        ]
-        
-        for pattern in patterns:
+        for pattern in MOVEMENT_PATTERNS:
             match = re.search(pattern, player_input.lower())
             if match:
                 try:
@@ -371,37 +739,26 @@ class GameFlowController:
         
         return None
     
-    def _validate_movement(self, current_pos: Tuple[int, int], target_pos: Tuple[int, int]) -> Tuple[bool, str]:
-        """Validate if movement from current to target position is allowed"""
-        current_q, current_r = current_pos
-        target_q, target_r = target_pos
-        
-        # Check if target is adjacent (hex grid adjacency)
-        dq = target_q - current_q
-        dr = target_r - current_r
-        ds = -dq - dr  # Third hex coordinate
-        
-        # Adjacent hexes have exactly one coordinate differ by 1, others by 0 or -1
-        if abs(dq) <= 1 and abs(dr) <= 1 and abs(ds) <= 1 and (dq + dr + ds == 0):
-            # Additional check: can't be the same hex
-            if dq == 0 and dr == 0:
-                return False, "You are already at this location"
-            return True, "Valid movement"
-        else:
-            return False, "Can only move to adjacent hexes"
+    def _plan_movement(self, game_state: GameState, current_pos: Tuple[int, int],
+                       target_pos: Tuple[int, int]) -> Tuple[Optional[Route], str]:
+        """Plan a route to the target: an adjacent step or a multi-hex journey"""
+        if current_pos == target_pos:
+            return None, "You are already at this location"
+        distance = hex_distance(current_pos, target_pos)
+        if distance > MAX_TRAVEL_DISTANCE:
+            return None, (f"Hex ({target_pos[0]},{target_pos[1]}) is {distance} hexes away; "
+                          f"journeys are limited to {MAX_TRAVEL_DISTANCE} hexes")
+        route = pathfinder.route(game_state, current_pos, target_pos)
+        if route is None:
+            return None, f"No passable route to hex ({target_pos[0]},{target_pos[1]})"
+        return route, "Valid movement"
     
     def _get_adjacent_hexes(self, q: int, r: int) -> List[Tuple[int, int]]:
         """Get list of adjacent hex coordinates"""
-        # Hex grid neighbors: 6 directions
-        directions = [
-            (1, 0), (1, -1), (0, -1),
-            (-1, 0), (-1, 1), (0, 1)
-        ]
-        
-        return [(q + dq, r + dr) for dq, dr in directions]
+        return HexMap.neighbours(q, r)
 
     async def _handle_movement(self, game_state: GameState, action_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle movement to a specific hex"""
+        """Handle movement to a specific hex (several hexes away resolves as one journey)"""
         player_input = action_data.get("player_input", "")
         
         # Parse target coordinates
@@ -415,40 +772,46 @@ class GameFlowController:
         target_q, target_r = target_coords
         current_q, current_r = game_state.get_current_position()
         
-        # Validate movement
-        is_valid, reason = self._validate_movement((current_q, current_r), (target_q, target_r))
-        if not is_valid:
+        # Plan the route (adjacent hexes are a one-step route)
+        route, reason = self._plan_movement(game_state, (current_q, current_r), (target_q, target_r))
+        if route is None:
             return {
                 "error": f"Invalid movement: {reason}",
                 "session_id": game_state.session_id
             }
         
-        # Execute movement
-        game_state.set_position(target_q, target_r)
-        game_state.mark_hex_explored(target_q, target_r)
+        # Execute movement one hex at a time, revealing what comes into view
+        revealed = []
+        for q, r in route.path[1:]:
+            game_state.set_position(q, r)
+            revealed.extend(visibility.update(game_state))
+            game_state.mark_hex_explored(q, r)
         
         # Generate narrative response
-        narrative = f"You move from hex ({current_q},{current_r}) to hex ({target_q},{target_r})."
-        
-        # Update history
-        game_state.add_history_entry(
-            action=f"Move to hex ({target_q},{target_r})",
-            result=narrative,
-            context=action_data
-        )
-        
-        # Increment turn count
-        turn_count = game_state.game_data.get("turn_count", 0) + 1
-        game_state.game_data["turn_count"] = turn_count
+        if route.steps == 1:
+            narrative = f"You move from hex ({current_q},{current_r}) to hex ({target_q},{target_r})."
+        else:
+            crossed = dict.fromkeys(game_state.get_hex(q, r).landscape.replace("_", " ") for q, r in route.path[1:])
+            narrative = (f"You travel {route.steps} hexes from ({current_q},{current_r}) to ({target_q},{target_r}), "
+                         f"crossing {', '.join(crossed)}.")
         
         return {
             "session_id": game_state.session_id,
             "narrative": narrative,
-            "game_state": game_state.to_dict(),
             "options": ["Explore this area", "Continue moving", "Rest"],
+            "route": [list(coords) for coords in route.path],
+            "travel_cost": route.cost,
+            "revealed": [list(coords) for coords in revealed],
             "action_data": action_data
         }
 
 
 # Global instance
-game_controller = GameFlowController()
+def _open_repository() -> Optional[SessionRepository]:
+    try:
+        return SessionRepository()
+    except Exception as e:
+        logger.error(f"Session database unavailable, sessions will not persist: {e}")
+        return None
+
+game_controller = GameFlowController(_open_repository())
@@ -0,0 +1,116 @@
+"""llm_cache.py - Completion Cache for Deterministic Prompts
+
+TWO-TIER CACHE:
+- In-memory LRU with per-entry TTL (hot tier)
+- Optional SQLite file on disk (survives restarts)
+- Keyed on the rendered (model, system_prompt, user_prompt) tuple
+- Hit/miss counters for tuning which templates are worth caching
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Default on-disk location: next to mythic_bastionlands.db
+DEFAULT_DISK_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "llm_cache.db")
+
+class CompletionCache:
+    """LRU + TTL cache for LLM completions with an optional SQLite tier"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0,
+                 disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (expires_at, text)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str) -> str:
+        """Hash the rendered prompt tuple into a cache key"""
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, user_prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a completion, checking memory first then disk"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry:
+            expires_at, text = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            del self._entries[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, text: str):
+        """Store a completion in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, text, expires_at)
+
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, text, expires_at)
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, text: str, expires_at: float):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._entries[key] = (expires_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached completions"""
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM completions")
+            self._db.commit()
+
+    def close(self):
+        """Close the disk tier"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "disk_enabled": self._db is not None
+        }
@@ -0,0 +1,155 @@
+"""llm_dispatcher.py - Prioritised Micro-Batching of LLM Calls
+
+REQUEST DISPATCH:
+- Every Ollama call waits here for one of num_parallel slots
+- Arrivals are collected for batch_window seconds before slots are handed out
+- Within a batch: interactive turns first, then speculative, then background
+- Calls for the same (model, template) go out back to back so the server keeps
+  reusing the same prompt prefix
+- Some slots stay reserved for interactive turns so background work never
+  blocks a player
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from game.metrics import metrics
+
+# Priorities, lowest value dispatched first
+INTERACTIVE = 0
+SPECULATIVE = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", SPECULATIVE: "speculative", BACKGROUND: "background"}
+
+# Priority for calls made in the current task (set by the caller, e.g. for speculation)
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+
+llm_queue_wait = metrics.histogram("llm_queue_wait_seconds", "Time an LLM call waited for a request slot")
+llm_queue_wait_by_priority = metrics.histogram(
+    "llm_queue_wait_by_priority_seconds", "Time an LLM call waited for a request slot", ("priority",))
+llm_waiting = metrics.gauge("llm_requests_waiting", "LLM calls waiting for a request slot")
+llm_in_flight = metrics.gauge("llm_requests_in_flight", "LLM calls currently sent to Ollama")
+llm_batches = metrics.histogram("llm_dispatch_batch_size", "Waiting calls considered per dispatch round")
+
+Group = Tuple[str, str]  # (model, template)
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    group: Group = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False, default_factory=time.perf_counter)
+
+class LLMDispatcher:
+    """Hands out Ollama request slots in prioritised, template-grouped batches"""
+
+    def __init__(self, num_parallel: int = 4, batch_window: float = 0.005, reserved_interactive: int = 1):
+        self.batch_window = batch_window
+        self.requested_reserved = reserved_interactive
+
+        self._pending: List[_Waiter] = []
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._last_group: Optional[Group] = None
+        self.set_capacity(num_parallel)
+
+    def set_capacity(self, num_parallel: int):
+        """Change the number of slots (e.g. when an endpoint joins the pool)"""
+        self.num_parallel = num_parallel
+        # Slots only interactive calls may take (never more than num_parallel - 1)
+        self.reserved_interactive = max(0, min(self.requested_reserved, num_parallel - 1))
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, group: Group, priority: Optional[int] = None) -> AsyncIterator[None]:
+        """Hold one request slot for the duration of an Ollama call"""
+        if priority is None:
+            priority = request_priority.get()
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), group, loop.create_future())
+        self._pending.append(waiter)
+        llm_waiting.inc()
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release()  # Granted just as we were cancelled
+            elif waiter in self._pending:
+                self._pending.remove(waiter)
+                llm_waiting.dec()
+            raise
+
+        wait = time.perf_counter() - waiter.enqueued
+        llm_queue_wait.observe(wait)
+        llm_queue_wait_by_priority.observe(wait, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        self._in_flight -= 1
+        llm_in_flight.dec()
+        self._dispatch()
+
+    def _flush(self):
+        """End of a batch window: start as many waiting calls as slots allow"""
+        self._flush_handle = None
+        if self._pending:
+            llm_batches.observe(len(self._pending))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots in priority order, keeping same-template calls together"""
+        while self._pending and self._in_flight < self.num_parallel:
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+            self._pending.remove(waiter)
+            llm_waiting.dec()
+            if waiter.future.done():  # Cancelled while queued
+                continue
+            self._in_flight += 1
+            llm_in_flight.inc()
+            self._last_group = waiter.group
+            waiter.future.set_result(None)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """Best eligible waiter: highest priority, then the group just sent, then arrival order"""
+        free = self.num_parallel - self._in_flight
+        eligible = [w for w in self._pending
+                    if w.priority == INTERACTIVE or free > self.reserved_interactive]
+        if not eligible:
+            return None
+        top = min(w.priority for w in eligible)
+        candidates = [w for w in eligible if w.priority == top]
+        same_group = [w for w in candidates if w.group == self._last_group]
+        return min(same_group or candidates)
+
+    def queue_depth(self) -> int:
+        """Calls waiting for a slot"""
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue state by priority"""
+        waiting: Dict[str, int] = {}
+        for waiter in self._pending:
+            name = PRIORITY_NAMES.get(waiter.priority, str(waiter.priority))
+            waiting[name] = waiting.get(name, 0) + 1
+        return {
+            "num_parallel": self.num_parallel,
+            "batch_window_ms": self.batch_window * 1000,
+            "reserved_interactive": self.reserved_interactive,
+            "in_flight": self._in_flight,
+            "waiting": waiting,
+        }
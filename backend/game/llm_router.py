@@ -0,0 +1,214 @@
+"""llm_router.py - Endpoint Pool and Model Routing for Ollama
+
+ENDPOINT POOL:
+- Any number of Ollama servers, each with its own pooled HTTP client
+- Per-endpoint latency (EWMA), in-flight count and failure tracking
+- Failing endpoints cool down with exponential backoff, then get retried
+- Optional background health check via /api/tags (also learns which models
+  each endpoint has pulled)
+
+MODEL ROUTING:
+- Templates can prefer models in order (e.g. a small model for action_interpreter)
+- route() yields (endpoint, model) candidates: preferred models first, least
+  loaded / fastest endpoint first; callers fail over down the list
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+
+from game.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+endpoint_latency = metrics.histogram("llm_endpoint_latency_seconds", "Ollama call latency per endpoint", ("endpoint",))
+endpoint_failures = metrics.counter("llm_endpoint_failures", "Failed Ollama calls per endpoint", ("endpoint", "reason"))
+failovers = metrics.counter("llm_failovers", "Calls retried on another endpoint or model")
+
+def normalize_model(name: str) -> str:
+    """Ollama treats 'name' and 'name:latest' as the same model"""
+    return name if ":" in name else f"{name}:latest"
+
+@dataclass
+class Endpoint:
+    """One Ollama server and its observed health"""
+    name: str
+    base_url: str
+    weight: float = 1.0  # Higher weight -> preferred when equally fast
+    models: Optional[Set[str]] = None  # Pulled models, None = unknown (assume any)
+    missing_models: Set[str] = field(default_factory=set)  # Answered 404 since the last health check
+
+    healthy: bool = True
+    consecutive_failures: int = 0
+    retry_at: float = 0.0  # monotonic time before which the endpoint is skipped
+    latency: Optional[float] = None  # EWMA of successful call latency, seconds
+    in_flight: int = 0
+    last_error: str = ""
+    _http: Optional[httpx.AsyncClient] = field(default=None, repr=False)
+
+    def serves(self, model: str) -> bool:
+        model = normalize_model(model)
+        if model in self.missing_models:
+            return False
+        return self.models is None or model in self.models
+
+    def available(self, now: float) -> bool:
+        return self.healthy or now >= self.retry_at
+
+    def score(self) -> float:
+        """Lower is better: expected latency scaled by current load"""
+        return (self.latency or 1.0) * (self.in_flight + 1) / self.weight
+
+class LLMRouter:
+    """Picks endpoints and models for each call and tracks how they behave"""
+
+    def __init__(self, endpoints: List[Endpoint], limits: httpx.Limits, timeout: httpx.Timeout,
+                 latency_alpha: float = 0.2, base_backoff: float = 2.0, max_backoff: float = 60.0,
+                 health_interval: float = 30.0):
+        if not endpoints:
+            raise ValueError("LLMRouter needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.limits = limits
+        self.timeout = timeout
+        self.latency_alpha = latency_alpha
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.health_interval = health_interval
+
+        self.model_preferences: Dict[str, List[str]] = {}  # template -> models, best first
+        self._health_task: Optional[asyncio.Task] = None
+
+    # Configuration
+
+    def add_endpoint(self, endpoint: Endpoint):
+        self.endpoints.append(endpoint)
+
+    def prefer(self, template_name: str, *models: str):
+        """Route a template to these models, in order of preference"""
+        self.model_preferences[template_name] = list(models)
+
+    def models_for(self, template_name: str, default_model: str) -> List[str]:
+        """Models to try for a template, best first, ending with the default"""
+        models = self.model_preferences.get(template_name, [])
+        return list(dict.fromkeys([*models, default_model]))
+
+    # Routing
+
+    def route(self, template_name: str, default_model: str) -> Iterator[Tuple[Endpoint, str]]:
+        """Candidate (endpoint, model) pairs in the order they should be tried
+
+        Healthy endpoints come first (preferred model, then lowest score);
+        endpoints whose backoff has expired come next as probes. If every
+        endpoint is cooling down, all of them are tried rather than none.
+        """
+        now = time.monotonic()
+        models = self.models_for(template_name, default_model)
+        healthy = sorted((ep for ep in self.endpoints if ep.healthy), key=Endpoint.score)
+        probing = sorted((ep for ep in self.endpoints if not ep.healthy and ep.available(now)),
+                         key=lambda ep: ep.retry_at)
+        if not healthy and not probing:
+            probing = sorted(self.endpoints, key=lambda ep: ep.retry_at)
+
+        for group in (healthy, probing):
+            for model in models:
+                for endpoint in group:
+                    if endpoint.serves(model):
+                        yield endpoint, model
+
+    def client(self, endpoint: Endpoint) -> httpx.AsyncClient:
+        """Pooled HTTP client for an endpoint, created on first use"""
+        if endpoint._http is None or endpoint._http.is_closed:
+            endpoint._http = httpx.AsyncClient(base_url=endpoint.base_url, limits=self.limits,
+                                               timeout=self.timeout)
+        return endpoint._http
+
+    # Outcome tracking
+
+    def record_success(self, endpoint: Endpoint, latency: float):
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency += self.latency_alpha * (latency - endpoint.latency)
+        if not endpoint.healthy:
+            logger.info(f"LLM endpoint {endpoint.name} recovered")
+        endpoint.healthy = True
+        endpoint.consecutive_failures = 0
+        endpoint_latency.observe(latency, endpoint=endpoint.name)
+
+    def record_failure(self, endpoint: Endpoint, reason: str, error: Any = ""):
+        """Take an endpoint out of rotation for an exponentially growing backoff"""
+        endpoint.consecutive_failures += 1
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** (endpoint.consecutive_failures - 1))
+        endpoint.retry_at = time.monotonic() + backoff
+        endpoint.last_error = str(error) or reason
+        if endpoint.healthy:
+            logger.warning(f"LLM endpoint {endpoint.name} marked unhealthy ({reason}): {error}")
+        endpoint.healthy = False
+        endpoint_failures.inc(endpoint=endpoint.name, reason=reason)
+
+    def record_missing_model(self, endpoint: Endpoint, model: str):
+        """The endpoint answered but does not have the model: skip that pair only"""
+        endpoint.missing_models.add(normalize_model(model))
+        logger.warning(f"LLM endpoint {endpoint.name} does not have model {model}")
+        endpoint_failures.inc(endpoint=endpoint.name, reason="model_missing")
+
+    # Health checks
+
+    async def check_health(self):
+        """Probe every endpoint's /api/tags, refreshing health and pulled models"""
+        async def probe(endpoint: Endpoint):
+            start = time.perf_counter()
+            try:
+                response = await self.client(endpoint).get("/api/tags")
+                response.raise_for_status()
+                endpoint.models = {normalize_model(m["name"]) for m in response.json().get("models", [])}
+                endpoint.missing_models.clear()
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                self.record_failure(endpoint, "health_check", e)
+                return
+            self.record_success(endpoint, time.perf_counter() - start)
+
+        await asyncio.gather(*(probe(endpoint) for endpoint in self.endpoints))
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def start(self):
+        """Start periodic health checks (call once the event loop is running)"""
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def aclose(self):
+        """Stop health checks and close every endpoint's connections"""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for endpoint in self.endpoints:
+            if endpoint._http is not None and not endpoint._http.is_closed:
+                await endpoint._http.aclose()
+            endpoint._http = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint health for /stats"""
+        return {
+            endpoint.name: {
+                "base_url": endpoint.base_url,
+                "healthy": endpoint.healthy,
+                "latency_ewma": endpoint.latency,
+                "in_flight": endpoint.in_flight,
+                "consecutive_failures": endpoint.consecutive_failures,
+                "models": sorted(endpoint.models) if endpoint.models is not None else None,
+                "last_error": endpoint.last_error,
+            }
+            for endpoint in self.endpoints
+        }
@@ -0,0 +1,231 @@
+"""metrics.py - In-Process Metrics Registry
+
+LIGHTWEIGHT METRICS:
+- Counter, Gauge and Histogram with optional label values
+- Histograms keep a bounded window of samples for percentiles
+- snapshot() gives a JSON-friendly view for /stats
+- render_prometheus() gives the text exposition format for /metrics
+  (histograms are exported as summaries: quantiles over the recent window)
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Iterator
+
+LabelKey = Tuple[str, ...]
+
+class _Metric:
+    """Base class: one value (or sample window) per label combination"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str = "", labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        return dict(self._values)
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        return dict(self._values)
+
+class Histogram(_Metric):
+    """Distribution of observations: count, sum and percentiles over recent samples"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str = "", labels: Tuple[str, ...] = (),
+                 window: int = 2048):
+        super().__init__(name, help_text, labels)
+        self.window = window
+        self._series: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"count": 0, "sum": 0.0, "recent": deque(maxlen=self.window)}
+            series["count"] += 1
+            series["sum"] += value
+            series["recent"].append(value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of a block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantiles(self, **labels) -> Dict[str, float]:
+        """count/sum/p50/p95/p99/max for one label combination (zeros if unseen)"""
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._series:
+                return {"count": 0, "sum": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+            return self.summary(key)
+
+    def percentile(self, q: float, **labels) -> float:
+        """q-th percentile (0-100) over the recent sample window"""
+        series = self._series.get(self._key(labels))
+        if not series or not series["recent"]:
+            return 0.0
+        return _percentile(sorted(series["recent"]), q)
+
+    def summary(self, key: LabelKey) -> Dict[str, float]:
+        series = self._series[key]
+        ordered = sorted(series["recent"])
+        return {
+            "count": series["count"],
+            "sum": series["sum"],
+            "p50": _percentile(ordered, 50),
+            "p95": _percentile(ordered, 95),
+            "p99": _percentile(ordered, 99),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+    def samples(self) -> Dict[LabelKey, Dict[str, float]]:
+        with self._lock:
+            return {key: self.summary(key) for key in self._series}
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+class MetricsRegistry:
+    """Named collection of metrics; get-or-create by name"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, labels: Tuple[str, ...], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str = "", labels: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = "", labels: Tuple[str, ...] = (),
+                  window: int = 2048) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labels, window=window)
+
+    def all(self) -> List[_Metric]:
+        return list(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view of every metric"""
+        result = {}
+        for metric in self.all():
+            samples = metric.samples()
+            if not metric.label_names:
+                result[metric.name] = samples.get((), 0.0 if metric.kind != "histogram" else {})
+            else:
+                result[metric.name] = {",".join(key): value for key, value in samples.items()}
+        return result
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in self.all():
+            name = _prometheus_name(metric.name)
+            if metric.kind == "counter" and not name.endswith("_total"):
+                name += "_total"
+            kind = "summary" if metric.kind == "histogram" else metric.kind
+            if metric.help:
+                lines.append(f"# HELP {name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(metric.samples().items()):
+                labels = list(zip(metric.label_names, key))
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for quantile, field_name in _QUANTILES:
+                    lines.append(f"{name}{_format_labels(labels + [('quantile', quantile)])} "
+                                 f"{_format_value(value[field_name])}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(value['count'])}")
+        return "\n".join(lines) + "\n"
+
+_QUANTILES = (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+
+def _prometheus_name(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "_:" else "_" for ch in name)
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels) + "}"
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+# Global registry
+metrics = MetricsRegistry()
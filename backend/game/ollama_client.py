@@ -4,12 +4,101 @@ FLEXIBLE PROMPT CONSTRUCTION:
 - Modular prompt templates
 - Context builders for different scenarios
 - Easy to experiment with different approaches
+
+ASYNC TRANSPORT:
+- Pooled keep-alive connections via httpx.AsyncClient
+- Per-host connection limits and connect/read timeouts
+- Never blocks the event loop while the model is generating
+- Calls go through a prioritised micro-batching dispatcher (game/llm_dispatcher.py)
+  bounded by the server's parallel request slots (OLLAMA_NUM_PARALLEL)
+- Optional token streaming for narrative responses
+- Endpoint pool with per-template model routing and failover (game/llm_router.py);
+  canned fallback text only when every endpoint has failed (or, with
+  fallback=False, LLMUnavailableError for callers that must not store it)
+
+COMPILED TEMPLATES:
+- user_template is split into literal segments and {variable} slots once
+- Slots are validated against the declared variables; rendering is single-pass
+
+STRUCTURED OUTPUT:
+- Templates with an output_schema (pydantic model) send its JSON schema as `format`
+- generate_structured() validates the reply and asks once for a fix if it is invalid
+
+GENERATION LIMITS:
+- Per-template num_predict / num_ctx / temperature / stop, sent as Ollama `options`
+- Runtime overrides per template (set_template_options) or per call (options=...)
+- Under a deep dispatcher queue, num_predict is scaled down so p95 latency holds
+- num_ctx should stay the same across templates sharing a model: changing it
+  makes Ollama reload the model
+
+INSTRUMENTATION:
+- Every call records wall/queue time, Ollama's prompt-eval and eval durations
+  and token counts, tokens/sec, template, cache hit/miss and session id
+- Per-template histograms live in the metrics registry (/metrics, call_stats());
+  the last few hundred call records are kept for inspection (recent_calls())
+
+COMPLETION CACHE:
+- Opt-in via enable_cache(); only templates flagged cacheable use it
+
+MODEL KV-CACHE REUSE:
+- Stable prefix first: system prompt + static world lore, then volatile content;
+  user templates put their instruction and short fields ahead of the game
+  state/context block, which changes every turn and so always comes last
+- keep_alive keeps the model loaded between turns
+- Conversational templates resend the session's prior exchanges so Ollama
+  can reuse the evaluated prefix instead of re-processing it every turn
 """
 
-import requests
+import httpx
+import inspect
 import json
-from typing import Dict, List, Any, Optional
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional, AsyncIterator, Sequence, Tuple, Type
 from dataclasses import dataclass, field
+from pydantic import BaseModel, ValidationError
+from game.llm_cache import CompletionCache, DEFAULT_DISK_PATH
+from game.context_builder import GameContextBuilder
+from game.llm_dispatcher import LLMDispatcher
+from game.llm_router import LLMRouter, Endpoint, failovers
+from game.metrics import metrics
+from game.schemas import ActionInterpretation
+from game.tracing import tracer, Span
+
+logger = logging.getLogger(__name__)
+
+structured_outputs = metrics.counter("llm_structured_outputs", "Structured replies by outcome", ("template", "outcome"))
+llm_calls = metrics.counter("llm_calls", "LLM calls by outcome", ("template", "outcome"))
+llm_call_seconds = metrics.histogram("llm_call_seconds", "Wall time of an LLM call including queueing", ("template",))
+llm_prompt_eval_seconds = metrics.histogram("llm_prompt_eval_seconds", "Prompt evaluation time reported by Ollama", ("template",))
+llm_eval_seconds = metrics.histogram("llm_eval_seconds", "Generation time reported by Ollama", ("template",))
+llm_tokens_per_second = metrics.histogram("llm_tokens_per_second", "Generation speed reported by Ollama", ("template",))
+llm_prompt_tokens = metrics.counter("llm_prompt_tokens", "Prompt tokens evaluated", ("template",))
+llm_generated_tokens = metrics.counter("llm_generated_tokens", "Tokens generated", ("template",))
+llm_cache_lookups = metrics.counter("llm_cache_lookups", "Completion cache lookups", ("template", "result"))
+shortened_generations = metrics.counter("llm_shortened_generations", "Calls whose num_predict was cut under load", ("template",))
+
+# Session the current task is working for; tags call records (set by the flow controller)
+call_session: ContextVar[Optional[str]] = ContextVar("call_session", default=None)
+
+class StructuredOutputError(ValueError):
+    """The model did not produce output matching the template's schema"""
+
+class LLMUnavailableError(RuntimeError):
+    """No endpoint produced a completion (raised instead of fallback text when asked to)"""
+
+# Static setting text shared by narrative templates; part of the cacheable prompt prefix
+WORLD_LORE = """SETTING: Mythic Bastionland. Knights of the Realm wander the Living Lands, sworn to
+seek out Myths and put them to rest. The land is old and strange: fallen holdings, ruined
+industry, omens that foretell each Myth. Seers speak in riddles, commoners fear the wilds,
+and every Knight is bound by a passion and an oath."""
+
+# {identifier} is a variable slot; other braces (e.g. literal JSON examples) are text
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
 
 @dataclass
 class PromptTemplate:
@@ -18,47 +107,183 @@ class PromptTemplate:
     system_prompt: str
     user_template: str
     variables: List[str] = field(default_factory=list)
+    cacheable: bool = False  # Same rendered prompt -> reuse the previous completion
+    include_lore: bool = False  # Append WORLD_LORE to the system prompt
+    conversational: bool = False  # Keep per-session chat history (see OllamaClient)
+    output_schema: Optional[Type[BaseModel]] = None  # Constrain replies to this model's JSON schema
+    
+    # Generation limits (None = model default)
+    num_predict: Optional[int] = None  # Max tokens to generate
+    num_ctx: Optional[int] = None  # Context window
+    temperature: Optional[float] = None
+    stop: Optional[List[str]] = None
+    
+    system_message: str = field(default="", init=False, repr=False, compare=False)
+    response_format: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    slots: Tuple[str, ...] = field(default=(), init=False, repr=False, compare=False)
+    _segments: Optional[Tuple[Tuple[str, str], ...]] = field(default=None, init=False, repr=False, compare=False)
+    _tail: str = field(default="", init=False, repr=False, compare=False)
+    
+    def compile(self):
+        """Split user_template into (literal, slot) segments, validating slot names
+
+        If no variables were declared they are inferred from the template.
+        """
+        segments = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(self.user_template):
+            segments.append((self.user_template[position:match.start()], match.group(1)))
+            position = match.end()
+        
+        slots = [slot for _, slot in segments]
+        if self.variables:
+            undeclared = sorted(set(slots) - set(self.variables))
+            if undeclared:
+                raise ValueError(f"Template '{self.name}' uses undeclared variables: {', '.join(undeclared)}")
+        else:
+            self.variables = list(dict.fromkeys(slots))
+        
+        # Normalised once so the prefix sent to the model is byte-identical every call
+        system = inspect.cleandoc(self.system_prompt)
+        self.system_message = f"{system}\n\n{WORLD_LORE}" if self.include_lore else system
+        self.response_format = self.output_schema.model_json_schema() if self.output_schema else None
+        
+        self.slots = tuple(dict.fromkeys(slots))
+        self._segments = tuple(segments)
+        self._tail = self.user_template[position:]
     
     def render(self, **kwargs) -> tuple[str, str]:
-        """Render the template with provided variables"""
-        rendered_user = self.user_template
-        for var, value in kwargs.items():
-            rendered_user = rendered_user.replace(f"{{{var}}}", str(value))
+        """Render the template with provided variables (single pass over the segments)"""
+        if self._segments is None:
+            self.compile()
+        # Literals and values are joined once at the end; `literal + value` per slot
+        # built a throwaway string each time and lost to str.replace on short templates
+        parts = []
+        try:
+            for literal, slot in self._segments:
+                parts.append(literal)
+                parts.append(str(kwargs[slot]))
+        except KeyError:
+            missing = [slot for slot in self.slots if slot not in kwargs]
+            raise ValueError(f"Template '{self.name}' missing variables: {', '.join(missing)}") from None
+        parts.append(self._tail)
         
-        return self.system_prompt, rendered_user
+        return self.system_message, "".join(parts)
+    
+    def generation_options(self) -> Dict[str, Any]:
+        """The template's limits as Ollama options (unset ones omitted)"""
+        options = {"num_predict": self.num_predict, "num_ctx": self.num_ctx,
+                   "temperature": self.temperature, "stop": self.stop}
+        return {key: value for key, value in options.items() if value is not None}
+
+@dataclass
+class AdaptiveLength:
+    """Scale num_predict down as the dispatcher queue grows
+
+    Full length up to `soft_depth` waiting calls, shrinking linearly to
+    `min_fraction` of it at `hard_depth` and beyond. Never applied to
+    structured templates, where a cut-off reply would be invalid JSON.
+    """
+    soft_depth: int = 4
+    hard_depth: int = 16
+    min_fraction: float = 0.4
+    min_tokens: int = 48
+    
+    def apply(self, num_predict: int, queue_depth: int) -> int:
+        if queue_depth <= self.soft_depth or num_predict <= self.min_tokens:
+            return num_predict
+        span = max(1, self.hard_depth - self.soft_depth)
+        pressure = min(1.0, (queue_depth - self.soft_depth) / span)
+        fraction = 1.0 - pressure * (1.0 - self.min_fraction)
+        return max(self.min_tokens, int(num_predict * fraction))
 
 class OllamaClient:
     """Flexible Ollama client for game interactions"""
     
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "tohur:latest"):
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "tohur:latest",
+                 max_connections: int = 10, max_keepalive_connections: int = 5,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_concurrent_requests: Optional[int] = None, batch_window: float = 0.005,
+                 keep_alive: str = "30m",
+                 max_conversation_messages: int = 12, max_conversations: int = 256,
+                 num_ctx: int = 4096, length_policy: Optional[AdaptiveLength] = None):
         self.base_url = base_url
         self.model = model
         self.templates = {}
+
+        # Transport settings - pooled clients are created lazily (per endpoint) so
+        # they bind to the running event loop rather than the import-time one
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.router = LLMRouter([Endpoint(name=base_url, base_url=base_url)], self.limits, self.timeout)
+        # Match the server's parallel slots; extra requests would only queue inside Ollama
+        self.max_concurrent_requests = max_concurrent_requests or int(os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+        self.dispatcher = LLMDispatcher(self.max_concurrent_requests, batch_window=batch_window)
+        self.cache: Optional[CompletionCache] = None
+        self.context_builder = GameContextBuilder()
+
+        # Generation limits: client-wide defaults < template < runtime override < per call
+        self.default_options: Dict[str, Any] = {"num_ctx": num_ctx}
+        self.option_overrides: Dict[str, Dict[str, Any]] = {}
+        self.length_policy = length_policy or AdaptiveLength()
+
+        # Model residency and per-session chat history for prefix reuse
+        self.keep_alive = keep_alive
+        self.max_conversation_messages = max_conversation_messages
+        self.max_conversations = max_conversations
+        self._conversations: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+
+        # Recent call records for inspection (see _record_call)
+        self.call_log: deque = deque(maxlen=256)
+
         self._load_default_templates()
+
+    def add_endpoint(self, base_url: str, name: Optional[str] = None, weight: float = 1.0):
+        """Add another Ollama server to the pool (each brings its own parallel slots)"""
+        self.router.add_endpoint(Endpoint(name=name or base_url, base_url=base_url, weight=weight))
+        self.dispatcher.set_capacity(self.max_concurrent_requests * len(self.router.endpoints))
+    
+    def prefer_models(self, template_name: str, *models: str):
+        """Route a template to specific models, best first (self.model stays the last resort)"""
+        self.router.prefer(template_name, *models)
+    
+    def start(self):
+        """Start endpoint health checks (call once the event loop is running)"""
+        self.router.start()
+    
+    async def aclose(self):
+        """Close pooled connections (call on application shutdown)"""
+        await self.router.aclose()
     
     def _load_default_templates(self):
         """Load default prompt templates"""
         
         # Game Master template for general narrative
-        self.templates["gamemaster"] = PromptTemplate(
+        self.add_template(PromptTemplate(
             name="gamemaster",
             system_prompt="""
             You are the Game Master for Mythic Bastionland, a dark fantasy RPG. 
             You control the world, NPCs, and consequences of player actions.
             Absolutely never switch roles or decide what the player does. You are ultimate judge / fate.
             Be descriptive but concise. Focus on atmosphere and meaningful choices.
-            """,
-            user_template="""
-            GAME STATE: {game_state}
-            PLAYER ACTION: {player_action}
-            PLAYER INTENT: {player_intent}
             Describe what happens - create pivotal / suspenseful moments and allow the user to decide what to do.
             """,
-            variables=["game_state", "player_action"]
-        )
+            user_template="""PLAYER INTENT: {player_intent}
+PLAYER ACTION: {player_action}
+GAME STATE: {game_state}""",
+            variables=["game_state", "player_action", "player_intent"],
+            include_lore=True,
+            conversational=True,
+            num_predict=320,
+            temperature=0.8,
+            stop=["\nPLAYER INTENT:", "\nPLAYER ACTION:", "\nGAME STATE:"]
+        ))
         
         # Action interpreter template
-        self.templates["action_interpreter"] = PromptTemplate(
+        self.add_template(PromptTemplate(
             name="action_interpreter",
             system_prompt="""
             You are an action interpreter for a text RPG. 
@@ -66,36 +291,52 @@ class OllamaClient:
             1. What they want to do (intent)
             2. How risky it is (low/medium/high)
             3. What game mechanics might apply
-            Respond in JSON format only.
-            """,
-            user_template="""
-            CURRENT SITUATION: {situation}
-            PLAYER INPUT: {player_input}
-            Analyze this action and respond with JSON:
-            {
-                "intent": "clear description of what player wants to do",
-                "risk_level": "low/medium/high",
-                "mechanics": ["list", "of", "relevant", "game", "mechanics"],
-                "needs_roll": true/false
-            }
+            4. Whether the outcome needs a dice roll
+            Respond with JSON only.
             """,
-            variables=["situation", "player_input"]
-        )
+            user_template="""CURRENT SITUATION: {situation}
+PLAYER INPUT: {player_input}""",
+            variables=["situation", "player_input"],
+            output_schema=ActionInterpretation,
+            cacheable=True,
+            num_predict=160,
+            temperature=0.1
+        ))
         
         # World builder template
-        self.templates["world_builder"] = PromptTemplate(
+        self.add_template(PromptTemplate(
             name="world_builder",
             system_prompt="""You create atmospheric locations and encounters for Mythic Bastionland.
 The world is dark, strange, and full of fallen industry and ancient mysteries.
-Focus on evocative details that suggest larger stories.""",
+Focus on evocative details that suggest larger stories.
+Make each place mysterious and atmospheric, with potential for interaction.""",
             user_template="""Create a {location_type} that the player discovers.
-Current context: {context}
-Make it mysterious and atmospheric, with potential for interaction.""",
-            variables=["location_type", "context"]
-        )
+Current context: {context}""",
+            variables=["location_type", "context"],
+            cacheable=True,
+            include_lore=True,
+            num_predict=240,
+            temperature=0.9
+        ))
+    
+        # Chronicler template for rolling old turns into long-range memory
+        self.add_template(PromptTemplate(
+            name="chronicler",
+            system_prompt="""You keep the chronicle of a knight's journey in Mythic Bastionland.
+Condense events into a short factual summary: places, people, oaths, wounds, discoveries.
+Never invent events. Write at most five sentences.""",
+            user_template="""Chronicle so far: {summary}
+New events:
+{events}
+Rewrite the chronicle to include the new events.""",
+            variables=["summary", "events"],
+            num_predict=200,
+            temperature=0.3
+        ))
     
     def add_template(self, template: PromptTemplate):
-        """Add a custom prompt template"""
+        """Add a custom prompt template (compiled and validated here)"""
+        template.compile()
         self.templates[template.name] = template
     
     def get_template(self, name: str) -> Optional[PromptTemplate]:
@@ -106,48 +347,439 @@ Make it mysterious and atmospheric, with potential for interaction.""",
         """List available template names"""
         return list(self.templates.keys())
     
-    async def generate(self, template_name: str, **kwargs) -> str:
-        """Generate text using a template"""
+    def enable_cache(self, max_entries: int = 512, ttl_seconds: float = 3600.0,
+                     disk: bool = False, disk_path: str = DEFAULT_DISK_PATH):
+        """Turn on the completion cache for cacheable templates"""
+        if self.cache:
+            self.cache.close()
+        self.cache = CompletionCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            disk_path=disk_path if disk else None
+        )
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters (empty when caching is off)"""
+        return self.cache.stats() if self.cache else {}
+    
+    def set_template_options(self, template_name: str, **options):
+        """Override a template's generation options at runtime (None removes an override)"""
+        overrides = self.option_overrides.setdefault(template_name, {})
+        for key, value in options.items():
+            if value is None:
+                overrides.pop(key, None)
+            else:
+                overrides[key] = value
+    
+    def _generation_options(self, template: PromptTemplate,
+                            options: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
+        """Resolve options for one call -> (options, shortened under load)"""
+        resolved = {**self.default_options, **template.generation_options(),
+                    **self.option_overrides.get(template.name, {}), **(options or {})}
+        num_predict = resolved.get("num_predict")
+        if not num_predict or num_predict < 0 or template.output_schema:
+            return resolved, False
+        
+        adjusted = self.length_policy.apply(num_predict, self.dispatcher.queue_depth())
+        if adjusted == num_predict:
+            return resolved, False
+        shortened_generations.inc(template=template.name)
+        return {**resolved, "num_predict": adjusted}, True
+    
+    def _cache_lookup(self, template_name: str, cache_key: Optional[str]) -> Optional[str]:
+        """Cached completion for a key (counting the hit or miss)"""
+        if not cache_key:
+            return None
+        cached = self.cache.get(cache_key)
+        llm_cache_lookups.inc(template=template_name, result="miss" if cached is None else "hit")
+        if cached is not None:
+            self.call_log.append({"template": template_name, "session_id": call_session.get(),
+                                  "outcome": "cache_hit", "cache": "hit", "timestamp": time.time()})
+        return cached
+    
+    def _cache_key(self, template: PromptTemplate, system_prompt: str, user_prompt: str,
+                   conversation_id: Optional[str] = None) -> Optional[str]:
+        """Cache key for a rendered template, or None if it should not be cached"""
+        if not self.cache or not template.cacheable or conversation_id:
+            return None
+        model = self.router.models_for(template.name, self.model)[0]
+        return CompletionCache.make_key(model, system_prompt, user_prompt)
+    
+    @staticmethod
+    def _conversation_id(template: PromptTemplate, session_id: Optional[str]) -> Optional[str]:
+        """Chat history key for conversational templates"""
+        if template.conversational and session_id:
+            return f"{session_id}:{template.name}"
+        return None
+    
+    async def generate(self, template_name: str, session_id: Optional[str] = None,
+                       remember: bool = True, options: Optional[Dict[str, Any]] = None,
+                       fallback: bool = True, **kwargs) -> str:
+        """Generate text using a template
+
+        session_id lets conversational templates continue the session's chat history;
+        remember=False reads that history without adding the exchange to it (speculative
+        calls, see remember_exchange). options overrides generation limits for this call.
+        fallback=False raises LLMUnavailableError instead of returning error or canned text.
+        """
+        template = self.get_template(template_name)
+        if not template:
+            raise ValueError(f"Template '{template_name}' not found")
+        
+        system_prompt, user_prompt = template.render(**kwargs)
+        conversation_id = self._conversation_id(template, session_id)
+        cache_key = self._cache_key(template, system_prompt, user_prompt, conversation_id)
+        cached = self._cache_lookup(template_name, cache_key)
+        if cached is not None:
+            return cached
+        
+        call_options, shortened = self._generation_options(template, options)
+        return await self._call_ollama(system_prompt, user_prompt, cache_key=None if shortened else cache_key,
+                                       conversation_id=conversation_id, remember=remember,
+                                       template_name=template_name,
+                                       response_format=template.response_format,
+                                       options=call_options, fallback=fallback)
+    
+    async def generate_structured(self, template_name: str, max_repairs: int = 1,
+                                  options: Optional[Dict[str, Any]] = None, **kwargs) -> BaseModel:
+        """Generate and validate a reply for a template with an output_schema
+
+        An invalid reply gets a short repair turn (the bad reply plus the validation
+        errors) instead of a full re-generation. Raises StructuredOutputError when
+        the reply is still invalid after max_repairs attempts, and LLMUnavailableError
+        when no endpoint answers (canned fallback text is never validated as a reply).
+        """
         template = self.get_template(template_name)
         if not template:
             raise ValueError(f"Template '{template_name}' not found")
+        if not template.output_schema:
+            raise ValueError(f"Template '{template_name}' has no output_schema")
         
         system_prompt, user_prompt = template.render(**kwargs)
-        return self._call_ollama(system_prompt, user_prompt)
+        cache_key = self._cache_key(template, system_prompt, user_prompt)
+        cached = self._cache_lookup(template_name, cache_key)
+        if cached is not None:
+            try:
+                return template.output_schema.model_validate_json(cached)
+            except ValidationError:
+                pass  # Cached before validation existed; regenerate
+        
+        call_options, _ = self._generation_options(template, options)
+        follow_up: List[Dict[str, str]] = []
+        for attempt in range(max_repairs + 1):
+            content = await self._call_ollama(system_prompt, user_prompt, template_name=template_name,
+                                              response_format=template.response_format,
+                                              follow_up=follow_up, options=call_options, fallback=False)
+            try:
+                result = template.output_schema.model_validate_json(content)
+            except ValidationError as e:
+                errors = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'reply'}: {err['msg']}"
+                                   for err in e.errors()[:5])
+                follow_up = [
+                    {"role": "assistant", "content": content[:2000]},
+                    {"role": "user", "content": f"Invalid reply ({errors}). Reply with only the corrected JSON."}
+                ]
+                continue
+            
+            structured_outputs.inc(template=template_name, outcome="repaired" if attempt else "valid")
+            if cache_key:
+                self.cache.put(cache_key, result.model_dump_json())
+            return result
+        
+        structured_outputs.inc(template=template_name, outcome="failed")
+        raise StructuredOutputError(f"Template '{template_name}' reply did not match its schema: {errors}")
+    
+    def remember_exchange(self, template_name: str, session_id: Optional[str], content: str, **kwargs):
+        """Record a completion made with remember=False once it is actually used"""
+        template = self.get_template(template_name)
+        conversation_id = self._conversation_id(template, session_id) if template else None
+        if conversation_id:
+            _, user_prompt = template.render(**kwargs)
+            self._record_exchange(conversation_id, user_prompt, content)
+    
+    async def generate_stream(self, template_name: str, session_id: Optional[str] = None,
+                              options: Optional[Dict[str, Any]] = None, **kwargs) -> AsyncIterator[str]:
+        """Generate text using a template, yielding tokens as they arrive"""
+        template = self.get_template(template_name)
+        if not template:
+            raise ValueError(f"Template '{template_name}' not found")
+        
+        system_prompt, user_prompt = template.render(**kwargs)
+        conversation_id = self._conversation_id(template, session_id)
+        cache_key = self._cache_key(template, system_prompt, user_prompt, conversation_id)
+        cached = self._cache_lookup(template_name, cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        call_options, shortened = self._generation_options(template, options)
+        async for token in self._stream_ollama(system_prompt, user_prompt,
+                                               cache_key=None if shortened else cache_key,
+                                               conversation_id=conversation_id,
+                                               template_name=template_name,
+                                               options=call_options):
+            yield token
     
     async def generate_raw(self, system_prompt: str, user_prompt: str) -> str:
         """Generate text with raw prompts (no template)"""
-        return self._call_ollama(system_prompt, user_prompt)
+        return await self._call_ollama(system_prompt, user_prompt)
+    
+    def _build_payload(self, system_prompt: str, user_prompt: str, stream: bool,
+                       conversation_id: Optional[str] = None, model: Optional[str] = None,
+                       response_format: Optional[Dict[str, Any]] = None,
+                       follow_up: Sequence[Dict[str, str]] = (),
+                       options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the /api/chat request body: stable prefix first, newest message last"""
+        messages = [{"role": "system", "content": system_prompt}]
+        if conversation_id:
+            messages.extend(self._conversations.get(conversation_id, []))
+        messages.append({"role": "user", "content": user_prompt})
+        messages.extend(follow_up)
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive
+        }
+        if response_format:
+            payload["format"] = response_format
+        if options:
+            payload["options"] = options
+        return payload
+    
+    def _record_exchange(self, conversation_id: str, user_prompt: str, content: str):
+        """Append a completed exchange to the session's chat history
+
+        History is trimmed by half when it overflows rather than one message at a
+        time, so the resent prefix stays identical for most consecutive turns.
+        """
+        history = self._conversations.setdefault(conversation_id, [])
+        self._conversations.move_to_end(conversation_id)
+        history.append({"role": "user", "content": user_prompt})
+        history.append({"role": "assistant", "content": content})
+        if len(history) > self.max_conversation_messages:
+            keep = self.max_conversation_messages // 2
+            del history[:len(history) - keep - (keep % 2)]
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
     
-    def _call_ollama(self, system_prompt: str, user_prompt: str) -> str:
-        """Make the actual API call to Ollama"""
+    def end_conversation(self, session_id: str):
+        """Forget a session's chat history"""
+        for key in [k for k in self._conversations if k.startswith(f"{session_id}:")]:
+            del self._conversations[key]
+    
+    def _dispatch_group(self, template_name: str) -> Tuple[str, str]:
+        return self.router.models_for(template_name, self.model)[0], template_name
+    
+    def _classify_failure(self, endpoint: Endpoint, model: str, error: Exception) -> bool:
+        """Record a failed call; True if another endpoint or model should be tried"""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status == 404:  # Model not pulled on this endpoint
+                self.router.record_missing_model(endpoint, model)
+                return True
+            if status >= 500:
+                self.router.record_failure(endpoint, "server_error", error)
+                return True
+            return False
+        if isinstance(error, httpx.TransportError):  # Refused, timeouts, dropped connections
+            self.router.record_failure(endpoint, type(error).__name__, error)
+            return True
+        self.router.record_failure(endpoint, "bad_response", error)
+        return True
+    
+    async def _call_ollama(self, system_prompt: str, user_prompt: str, cache_key: Optional[str] = None,
+                           conversation_id: Optional[str] = None, remember: bool = True,
+                           template_name: str = "raw", response_format: Optional[Dict[str, Any]] = None,
+                           follow_up: Sequence[Dict[str, str]] = (),
+                           options: Optional[Dict[str, Any]] = None, fallback: bool = True) -> str:
+        """Make the actual API call to Ollama, failing over across endpoints and models"""
+        with tracer.span(f"llm.{template_name}", kind="client", template=template_name) as span:
+            started = time.perf_counter()
+            async with self.dispatcher.slot(self._dispatch_group(template_name)):
+                queued = time.perf_counter() - started
+                span.set_attribute("queue_ms", round(queued * 1000, 1))
+                for attempt, (endpoint, model) in enumerate(self.router.route(template_name, self.model)):
+                    if attempt:
+                        failovers.inc()
+                    payload = self._build_payload(system_prompt, user_prompt, stream=False,
+                                                  conversation_id=conversation_id, model=model,
+                                                  response_format=response_format, follow_up=follow_up,
+                                                  options=options)
+                    endpoint.in_flight += 1
+                    start = time.perf_counter()
+                    try:
+                        response = await self.router.client(endpoint).post("/api/chat", json=payload)
+                        response.raise_for_status()
+                        result = response.json()
+                        content = result["message"]["content"]
+                    except (httpx.HTTPError, ValueError, KeyError) as e:
+                        if not self._classify_failure(endpoint, model, e):
+                            self._record_call(span, template_name, started, queued, "error", endpoint, model)
+                            if not fallback:
+                                raise LLMUnavailableError(f"Error communicating with Ollama: {e}") from e
+                            return f"Error communicating with Ollama: {e}"
+                        continue
+                    finally:
+                        endpoint.in_flight -= 1
+                
+                    self.router.record_success(endpoint, time.perf_counter() - start)
+                    self._record_call(span, template_name, started, queued, "ok", endpoint, model, result,
+                                      cache="miss" if cache_key else None)
+                    if cache_key:
+                        self.cache.put(cache_key, content)
+                    if conversation_id and remember:
+                        self._record_exchange(conversation_id, user_prompt, content)
+                    return content
+        
+            # Every endpoint failed
+            self._record_call(span, template_name, started, queued, "fallback")
+            if not fallback:
+                raise LLMUnavailableError(f"No LLM endpoint could serve '{template_name}'")
+            logger.error(f"No LLM endpoint could serve '{template_name}', using fallback text")
+            return self._get_fallback_response(system_prompt, user_prompt)
+    
+    async def _stream_ollama(self, system_prompt: str, user_prompt: str, cache_key: Optional[str] = None,
+                             conversation_id: Optional[str] = None, template_name: str = "raw",
+                             options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Stream a chat completion from Ollama (newline-delimited JSON chunks)
+
+        Fails over like _call_ollama until the first token arrives; after that a
+        broken stream ends with an error line instead.
+        """
+        # Not made current: the generator suspends inside the consumer's context
+        span = tracer.start_span(f"llm.{template_name}", kind="client", template=template_name, stream=True)
         try:
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "stream": False
+            async for token in self._stream_attempts(span, system_prompt, user_prompt, cache_key,
+                                                     conversation_id, template_name, options):
+                yield token
+        finally:
+            tracer.end_span(span)
+    
+    async def _stream_attempts(self, span: Span, system_prompt: str, user_prompt: str, cache_key: Optional[str],
+                               conversation_id: Optional[str], template_name: str,
+                               options: Optional[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Body of _stream_ollama: try candidates until one streams"""
+        started = time.perf_counter()
+        async with self.dispatcher.slot(self._dispatch_group(template_name)):
+            queued = time.perf_counter() - started
+            span.set_attribute("queue_ms", round(queued * 1000, 1))
+            for attempt, (endpoint, model) in enumerate(self.router.route(template_name, self.model)):
+                if attempt:
+                    failovers.inc()
+                payload = self._build_payload(system_prompt, user_prompt, stream=True,
+                                              conversation_id=conversation_id, model=model,
+                                              options=options)
+                parts = []
+                final: Dict[str, Any] = {}
+                endpoint.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    async with self.router.client(endpoint).stream("POST", "/api/chat", json=payload) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            content = chunk.get("message", {}).get("content")
+                            if content:
+                                parts.append(content)
+                                yield content
+                            if chunk.get("done"):
+                                final = chunk
+                                break
+                except (httpx.HTTPError, ValueError) as e:
+                    retry = self._classify_failure(endpoint, model, e)
+                    if parts or not retry:
+                        self._record_call(span, template_name, started, queued, "error", endpoint, model)
+                        yield f"Error communicating with Ollama: {e}"
+                        return
+                    continue
+                finally:
+                    endpoint.in_flight -= 1
+                
+                self.router.record_success(endpoint, time.perf_counter() - start)
+                self._record_call(span, template_name, started, queued, "ok", endpoint, model, final,
+                                  cache="miss" if cache_key else None)
+                if cache_key:
+                    self.cache.put(cache_key, "".join(parts))
+                if conversation_id:
+                    self._record_exchange(conversation_id, user_prompt, "".join(parts))
+                return
+        
+        logger.error(f"No LLM endpoint could serve '{template_name}', using fallback text")
+        self._record_call(span, template_name, started, queued, "fallback")
+        yield self._get_fallback_response(system_prompt, user_prompt)
+    
+    def _record_call(self, span: Span, template_name: str, started: float, queued: float, outcome: str,
+                     endpoint: Optional[Endpoint] = None, model: Optional[str] = None,
+                     result: Optional[Dict[str, Any]] = None, cache: Optional[str] = None):
+        """Record one model call: metrics per template, call_log entry and span attributes
+
+        result is Ollama's final response object; its *_duration fields are nanoseconds.
+        """
+        wall = time.perf_counter() - started
+        llm_calls.inc(template=template_name, outcome=outcome)
+        llm_call_seconds.observe(wall, template=template_name)
+        record = {
+            "template": template_name,
+            "session_id": call_session.get(),
+            "outcome": outcome,
+            "cache": cache,
+            "endpoint": endpoint.name if endpoint else None,
+            "model": model,
+            "wall_ms": round(wall * 1000, 1),
+            "queue_ms": round(queued * 1000, 1),
+            "timestamp": time.time()
+        }
+        
+        if result:
+            prompt_eval = result.get("prompt_eval_duration", 0) / 1e9
+            generation = result.get("eval_duration", 0) / 1e9
+            prompt_tokens = result.get("prompt_eval_count", 0)
+            generated_tokens = result.get("eval_count", 0)
+            tokens_per_second = generated_tokens / generation if generation else 0.0
+            if "prompt_eval_duration" in result:
+                llm_prompt_eval_seconds.observe(prompt_eval, template=template_name)
+            if generation:
+                llm_eval_seconds.observe(generation, template=template_name)
+                llm_tokens_per_second.observe(tokens_per_second, template=template_name)
+            llm_prompt_tokens.inc(prompt_tokens, template=template_name)
+            llm_generated_tokens.inc(generated_tokens, template=template_name)
+            record.update({
+                "prompt_eval_ms": round(prompt_eval * 1000, 1),
+                "eval_ms": round(generation * 1000, 1),
+                "prompt_tokens": prompt_tokens,
+                "generated_tokens": generated_tokens,
+                "tokens_per_second": round(tokens_per_second, 1)
+            })
+        
+        self.call_log.append(record)
+        for key in ("outcome", "model", "endpoint", "prompt_tokens", "generated_tokens"):
+            if record.get(key) is not None:
+                span.set_attribute(key, record[key])
+        logger.debug(f"LLM call {record}")
+    
+    def call_stats(self) -> Dict[str, Any]:
+        """Per-template latency percentiles (seconds) and token throughput"""
+        stats = {}
+        for key, summary in llm_call_seconds.samples().items():
+            template_name = key[0]
+            stats[template_name] = {
+                "wall_seconds": summary,
+                "prompt_eval_seconds": llm_prompt_eval_seconds.quantiles(template=template_name),
+                "eval_seconds": llm_eval_seconds.quantiles(template=template_name),
+                "tokens_per_second": llm_tokens_per_second.quantiles(template=template_name),
+                "prompt_tokens": llm_prompt_tokens.value(template=template_name),
+                "generated_tokens": llm_generated_tokens.value(template=template_name),
+                "cache_hits": llm_cache_lookups.value(template=template_name, result="hit"),
+                "cache_misses": llm_cache_lookups.value(template=template_name, result="miss")
             }
-            
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            return result["message"]["content"]
-            
-        except requests.exceptions.RequestException as e:
-            # Return a fallback response when Ollama is unavailable
-            if "404" in str(e) or "Connection" in str(e):
-                return self._get_fallback_response(system_prompt, user_prompt)
-            return f"Error communicating with Ollama: {e}"
-        except Exception as e:
-            return f"Unexpected error: {e}"
+        return stats
+    
+    def recent_calls(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """The most recent call records, newest last"""
+        return list(self.call_log)[-limit:]
     
     def _get_fallback_response(self, system_prompt: str, user_prompt: str) -> str:
         """Generate fallback responses when Ollama is unavailable"""
@@ -158,32 +790,9 @@ Make it mysterious and atmospheric, with potential for interaction.""",
         else:
             return f"Your head swirls - Was it the food? The drink? - Your eyes drift closed, your body sags, and you snore before hitting the ground."
     
-    def build_game_context(self, game_state: Any) -> str:
-        """Build context string from game state for prompts"""
-        context_parts = []
-        
-        # Character info
-        main_char = game_state.get_main_character()
-        if main_char:
-            context_parts.append(f"Character: {main_char.name}")
-            if main_char.stats:
-                stats_str = ", ".join([f"{k}:{v}" for k, v in main_char.stats.items()])
-                context_parts.append(f"Stats: {stats_str}")
-            if main_char.inventory:
-                context_parts.append(f"Inventory: {', '.join(main_char.inventory)}")
-        
-        # World info
-        world_data = game_state.world_data
-        if world_data.get("current_location"):
-            context_parts.append(f"Location: {world_data['current_location']}")
-        
-        # Recent history
-        if game_state.history:
-            recent = game_state.history[-3:]  # Last 3 actions
-            history_str = " → ".join([h["action"] for h in recent])
-            context_parts.append(f"Recent: {history_str}")
-        
-        return "\n".join(context_parts)
+    def build_game_context(self, game_state: Any, token_budget: Optional[int] = None) -> str:
+        """Build context string from game state for prompts (cached per section)"""
+        return self.context_builder.build(game_state, token_budget)
     
     def create_prompt_experiment(self, name: str, system: str, user: str, variables: List[str]):
         """Quick way to create and test new prompt templates"""
@@ -197,4 +806,4 @@ Make it mysterious and atmospheric, with potential for interaction.""",
         return template
 
 # Global instance for easy access
-ollama = OllamaClient()
\ No newline at end of file
+ollama = OllamaClient(base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""pathfinding.py - Routes Across the Hex Map
+
+TERRAIN COSTS:
+- Cost is paid on entering a hex and depends on its landscape (forest and
+  hills are slow, marsh slower, lakes and peaks impassable)
+- Undiscovered hexes are costed from the world generator, so a route can be
+  planned into terrain the party has not seen yet
+
+SEARCH:
+- find_path: A* over axial coordinates (hex distance is an admissible
+  heuristic because every passable hex costs at least 1)
+- Journeys are capped at MAX_TRAVEL_DISTANCE hexes and searched only within
+  DETOUR_MARGIN of the straight-line distance around the goal, so even an
+  unreachable target costs a few thousand hex lookups at most
+- distance_field: Dijkstra outwards from a target, giving the cost to reach it
+  from every hex within a radius; any number of routes to that target are then
+  read off by following next hops
+- route() builds a field instead of running A* for targets worth it: hexes
+  with a landmark, and any target the session has asked for before (a
+  journey resumed, or a return trip); later trips there from anywhere in
+  the field are a walk along next hops
+- Fields are cached per (session, target) and dropped when the session's
+  terrain changes (GameState "terrain" section version)
+"""
+
+import heapq
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import GameState, HexMap, hex_distance
+from game.metrics import metrics
+from game.world_gen import world_generator
+
+Coords = Tuple[int, int]
+
+field_lookups = metrics.counter("distance_field_lookups", "Distance field cache lookups", ("outcome",))
+
+# Cost to enter a hex by landscape; None = impassable
+TERRAIN_COSTS: Dict[str, Optional[float]] = {
+    "plains": 1.0,
+    "meadow": 1.0,
+    "heath": 1.0,
+    "starting_area": 1.0,
+    "forest": 2.0,
+    "hills": 2.0,
+    "marsh": 3.0,
+    "crags": 3.0,
+    "peaks": None,
+    "lake": None,
+}
+DEFAULT_COST = 1.5  # Landscapes not listed above
+
+# Searches never expand beyond this many hexes (keeps a bad request cheap)
+MAX_EXPANSIONS = 20000
+
+# Furthest target a single journey may aim for, and how far a route may stray beyond it
+MAX_TRAVEL_DISTANCE = 24
+DETOUR_MARGIN = 6
+
+@dataclass
+class Route:
+    """A planned path: start and goal included"""
+    path: List[Coords]
+    cost: float
+
+    @property
+    def steps(self) -> int:
+        return len(self.path) - 1
+
+@dataclass
+class DistanceField:
+    """Cost to reach `target` from every hex within `radius` of it"""
+    target: Coords
+    radius: int
+    costs: Dict[Coords, float]
+    next_hop: Dict[Coords, Coords]  # First step of the cheapest route to target
+    terrain_version: int
+
+    def covers(self, coords: Coords) -> bool:
+        return coords in self.costs
+
+    def route_from(self, start: Coords) -> Optional[Route]:
+        """Follow next hops from start to the target"""
+        if start not in self.costs:
+            return None
+        path = [start]
+        while path[-1] != self.target:
+            path.append(self.next_hop[path[-1]])
+        return Route(path, self.costs[start])
+
+class PathFinder:
+    """A* routes and cached Dijkstra distance fields for game sessions"""
+
+    def __init__(self, max_fields: int = 256):
+        self.max_fields = max_fields
+        self._fields: "OrderedDict[Tuple[str, Coords], DistanceField]" = OrderedDict()
+        # Targets routed to by A* so far, so a second request for one builds a field
+        self._targets: "OrderedDict[Tuple[str, Coords], None]" = OrderedDict()
+
+    # Terrain
+
+    @staticmethod
+    def cost_function(game_state: GameState) -> Callable[[Coords], Optional[float]]:
+        """Entry cost of a hex for this session: known hexes first, else generated terrain"""
+        seed = world_generator.seed_for(game_state)
+
+        def cost(coords: Coords) -> Optional[float]:
+            hex_obj = game_state.get_hex(*coords) or world_generator.hex_at(seed, *coords)
+            return TERRAIN_COSTS.get(hex_obj.landscape, DEFAULT_COST)
+        return cost
+
+    # A*
+
+    def find_path(self, game_state: GameState, start: Coords, goal: Coords,
+                  max_expansions: int = MAX_EXPANSIONS, radius: Optional[int] = None) -> Optional[Route]:
+        """Cheapest route from start to goal, or None if unreachable
+
+        With a radius, only hexes within that distance of the goal are searched.
+        """
+        cost = self.cost_function(game_state)
+        if start == goal:
+            return Route([start], 0.0)
+        if cost(goal) is None:
+            return None
+
+        best: Dict[Coords, float] = {start: 0.0}
+        came_from: Dict[Coords, Coords] = {}
+        frontier = [(hex_distance(start, goal), 0.0, start)]
+        expansions = 0
+        while frontier:
+            _, spent, current = heapq.heappop(frontier)
+            if current == goal:
+                return Route(self._unwind(came_from, start, goal), spent)
+            if spent > best[current]:
+                continue  # Stale entry
+            expansions += 1
+            if expansions > max_expansions:
+                break
+            for neighbour in HexMap.neighbours(*current):
+                if radius is not None and hex_distance(neighbour, goal) > radius:
+                    continue
+                step = cost(neighbour)
+                if step is None:
+                    continue
+                total = spent + step
+                if total < best.get(neighbour, float("inf")):
+                    best[neighbour] = total
+                    came_from[neighbour] = current
+                    heapq.heappush(frontier, (total + hex_distance(neighbour, goal), total, neighbour))
+        return None
+
+    @staticmethod
+    def _unwind(came_from: Dict[Coords, Coords], start: Coords, goal: Coords) -> List[Coords]:
+        path = [goal]
+        while path[-1] != start:
+            path.append(came_from[path[-1]])
+        path.reverse()
+        return path
+
+    # Distance fields
+
+    def distance_field(self, game_state: GameState, target: Coords, radius: int) -> DistanceField:
+        """Cached cost-to-target for every hex within radius (recomputed after terrain changes)"""
+        key = (game_state.session_id, target)
+        terrain_version = game_state.section_versions.get("terrain", 0)
+        field = self._fields.get(key)
+        if field is not None and field.terrain_version == terrain_version and field.radius >= radius:
+            self._fields.move_to_end(key)
+            field_lookups.inc(outcome="hit")
+            return field
+
+        field_lookups.inc(outcome="miss")
+        costs, next_hop = self._dijkstra(game_state, target, radius)
+        field = DistanceField(target, radius, costs, next_hop, terrain_version)
+        self._fields[key] = field
+        while len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def _dijkstra(self, game_state: GameState, target: Coords,
+                  radius: int) -> Tuple[Dict[Coords, float], Dict[Coords, Coords]]:
+        """Cost to reach target, and the first step there, from each hex within radius
+
+        Runs outwards from the target over reversed edges: stepping from a
+        neighbour into the current hex costs the current hex's entry cost.
+        """
+        cost = self.cost_function(game_state)
+        costs: Dict[Coords, float] = {target: 0.0}
+        next_hop: Dict[Coords, Coords] = {}
+        if cost(target) is None:
+            return costs, next_hop
+
+        frontier = [(0.0, target)]
+        while frontier:
+            spent, current = heapq.heappop(frontier)
+            if spent > costs[current]:
+                continue
+            total = spent + cost(current)  # Impassable hexes are never queued
+            for neighbour in HexMap.neighbours(*current):
+                if hex_distance(neighbour, target) > radius or cost(neighbour) is None:
+                    continue
+                if total < costs.get(neighbour, float("inf")):
+                    costs[neighbour] = total
+                    next_hop[neighbour] = current
+                    heapq.heappush(frontier, (total, neighbour))
+        return costs, next_hop
+
+    def invalidate(self, session_id: str):
+        """Drop every cached field (and remembered target) for a session"""
+        for key in [key for key in self._fields if key[0] == session_id]:
+            del self._fields[key]
+        for key in [key for key in self._targets if key[0] == session_id]:
+            del self._targets[key]
+
+    # Routing
+
+    def route(self, game_state: GameState, start: Coords, goal: Coords) -> Optional[Route]:
+        """Route via a cached distance field for goal when one covers start, else A*
+
+        None when the goal is unreachable or further than MAX_TRAVEL_DISTANCE.
+        """
+        distance = hex_distance(start, goal)
+        if distance > MAX_TRAVEL_DISTANCE:
+            return None
+        key = (game_state.session_id, goal)
+        field = self._fields.get(key)
+        if (field is not None and field.covers(start)
+                and field.terrain_version == game_state.section_versions.get("terrain", 0)):
+            field_lookups.inc(outcome="hit")
+            return field.route_from(start)
+        
+        if self._worth_field(game_state, goal):
+            radius = max(distance + DETOUR_MARGIN, field.radius if field is not None else 0)
+            return self.distance_field(game_state, goal, radius).route_from(start)
+        
+        self._targets[key] = None
+        while len(self._targets) > self.max_fields:
+            self._targets.popitem(last=False)
+        return self.find_path(game_state, start, goal, radius=distance + DETOUR_MARGIN)
+    
+    def _worth_field(self, game_state: GameState, goal: Coords) -> bool:
+        """Targets likely to be travelled to again: landmarks and repeated destinations"""
+        if (game_state.session_id, goal) in self._targets:
+            return True
+        hex_obj = game_state.get_hex(*goal) or world_generator.hex_at(world_generator.seed_for(game_state), *goal)
+        return bool(hex_obj.landmark)
+
+    def stats(self):
+        return {"cached_fields": len(self._fields), "remembered_targets": len(self._targets),
+                "max_fields": self.max_fields}
+
+# Global instance
+pathfinder = PathFinder()
@@ -0,0 +1,23 @@
+"""schemas.py - Structured LLM Output Models
+
+SCHEMA-CONSTRAINED OUTPUT:
+- Pydantic models for templates that must answer in JSON
+- The JSON schema is sent as Ollama's `format`, so decoding is constrained to it
+- Responses are validated back into the model (see OllamaClient.generate_structured)
+"""
+
+from typing import List, Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+class ActionInterpretation(BaseModel):
+    """What the action_interpreter decided the player is trying to do"""
+    intent: str = Field(description="clear description of what player wants to do")
+    risk_level: Literal["low", "medium", "high"] = "low"
+    mechanics: List[str] = Field(default_factory=list, description="relevant game mechanics")
+    needs_roll: bool = False
+
+    @field_validator("risk_level", mode="before")
+    @classmethod
+    def _normalise_risk(cls, value):
+        return value.strip().lower() if isinstance(value, str) else value
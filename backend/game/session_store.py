@@ -0,0 +1,199 @@
+"""session_store.py - In-Memory Session Cache with Write-Behind Persistence
+
+SESSION LIFECYCLE:
+- Hot sessions live in an LRU-ordered dict (bounded by max_active)
+- Changed sessions are marked dirty and flushed to SQLite in the background
+- Misses are loaded lazily from the database
+- Without a database, turns queued for the actions table are discarded on
+  each flush; after a failed write at most MAX_PENDING_ACTIONS are kept for
+  the retry, so a session's memory stays bounded either way
+- Idle or least-recently-used sessions are flushed, then evicted from memory
+- Listeners in on_evict hear about every session leaving memory, so per-session
+  caches kept elsewhere can be dropped with it
+- Sessions held by a running turn or background task are never evicted, so
+  changes made after the hold began cannot be lost with an evicted copy
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from models import GameState
+from database import SessionRepository
+
+logger = logging.getLogger(__name__)
+
+# Turns kept for retry per session when writes to the actions table keep failing
+MAX_PENDING_ACTIONS = 200
+
+class SessionStore:
+    """LRU session cache backed by a SessionRepository"""
+
+    def __init__(self, repository: Optional[SessionRepository] = None, max_active: int = 100,
+                 idle_timeout: float = 1800.0, flush_interval: float = 5.0):
+        self.repository = repository
+        self.max_active = max_active
+        self.idle_timeout = idle_timeout
+        self.flush_interval = flush_interval
+
+        self.sessions: "OrderedDict[str, GameState]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._dirty: Set[str] = set()
+        self._holds: Dict[str, int] = {}
+        self.on_evict: List[Callable[[str], None]] = []  # Called with the id of each session removed
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def get(self, session_id: str) -> Optional[GameState]:
+        """Get a session from memory, falling back to the database"""
+        game_state = self.sessions.get(session_id)
+        if game_state is None and self.repository:
+            try:
+                snapshot = self.repository.load(session_id)
+            except Exception as e:
+                logger.error(f"Failed to load session {session_id}: {e}")
+                snapshot = None
+            if snapshot:
+                game_state = GameState.from_snapshot(snapshot)
+                logger.info(f"Loaded session {session_id} from database")
+                self._insert(session_id, game_state)
+                return game_state
+
+        if game_state is not None:
+            self._touch(session_id)
+        return game_state
+
+    def put(self, session_id: str, game_state: GameState):
+        """Add (or replace) a session and schedule it for persistence"""
+        self._insert(session_id, game_state)
+        self.mark_dirty(session_id)
+
+    def pop(self, session_id: str) -> Optional[GameState]:
+        """Remove a session from memory without persisting it"""
+        self._last_access.pop(session_id, None)
+        self._dirty.discard(session_id)
+        game_state = self.sessions.pop(session_id, None)
+        for listener in self.on_evict:
+            listener(session_id)
+        return game_state
+
+    def mark_dirty(self, session_id: str):
+        """Flag a session as changed since its last write"""
+        if session_id in self.sessions:
+            self._dirty.add(session_id)
+
+    @contextmanager
+    def hold(self, session_id: str) -> Iterator[None]:
+        """Keep a session in memory while work on it is in flight"""
+        self._holds[session_id] = self._holds.get(session_id, 0) + 1
+        try:
+            yield
+        finally:
+            self._holds[session_id] -= 1
+            if not self._holds[session_id]:
+                del self._holds[session_id]
+                self._trim()
+
+    def _touch(self, session_id: str):
+        self.sessions.move_to_end(session_id)
+        self._last_access[session_id] = time.monotonic()
+
+    def _insert(self, session_id: str, game_state: GameState):
+        self.sessions[session_id] = game_state
+        self._touch(session_id)
+        self._trim()
+
+    def _trim(self):
+        """Evict least-recently-used sessions down to max_active, skipping held ones"""
+        excess = len(self.sessions) - self.max_active
+        if excess <= 0:
+            return
+        for session_id in [sid for sid in self.sessions if sid not in self._holds][:excess]:
+            self.evict(session_id)
+
+    def evict(self, session_id: str):
+        """Persist a session if needed and drop it from memory"""
+        if session_id in self._dirty:
+            self._write(session_id)
+        self.pop(session_id)
+        logger.info(f"Evicted session {session_id} from memory, {len(self.sessions)} active")
+
+    def evict_idle(self):
+        """Evict sessions that have not been used for idle_timeout seconds"""
+        cutoff = time.monotonic() - self.idle_timeout
+        for session_id in [sid for sid, seen in self._last_access.items()
+                           if seen < cutoff and sid not in self._holds]:
+            self.evict(session_id)
+
+    def _write(self, session_id: str):
+        """Synchronously persist one session"""
+        game_state = self.sessions[session_id]
+        actions = game_state.drain_pending_actions()
+        if not self.repository:
+            self._dirty.discard(session_id)
+            return
+        try:
+            self.repository.save(game_state.to_snapshot(), actions)
+            self._dirty.discard(session_id)
+        except Exception as e:
+            self._requeue(game_state, actions)
+            logger.error(f"Failed to persist session {session_id}: {e}")
+
+    @staticmethod
+    def _requeue(game_state: GameState, actions):
+        """Put unwritten turns back for the next attempt, keeping only the newest"""
+        pending = actions + game_state.pending_actions
+        game_state.pending_actions = pending[-MAX_PENDING_ACTIONS:]
+
+    async def flush(self):
+        """Write all dirty sessions without blocking the event loop"""
+        if not self.repository:
+            for session_id in self._dirty:
+                if session_id in self.sessions:
+                    self.sessions[session_id].drain_pending_actions()  # Nowhere to write them
+            self._dirty.clear()
+            return
+        for session_id in list(self._dirty):
+            game_state = self.sessions.get(session_id)
+            self._dirty.discard(session_id)
+            if game_state is None:
+                continue
+            # Snapshot on the loop thread so the copy is consistent, write in a worker
+            snapshot = game_state.to_snapshot()
+            actions = game_state.drain_pending_actions()
+            try:
+                await asyncio.to_thread(self.repository.save, snapshot, actions)
+            except Exception as e:
+                logger.error(f"Failed to persist session {session_id}: {e}")
+                self._requeue(game_state, actions)
+                self._dirty.add(session_id)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            self.evict_idle()
+
+    def start(self):
+        """Prepare the database and start the background write-behind loop"""
+        if self._flush_task is None:
+            if self.repository:
+                try:
+                    self.repository.initialize()
+                except Exception as e:
+                    logger.error(f"Session database unavailable, sessions will not persist: {e}")
+                    self.repository = None
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background loop and flush everything still pending"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,180 @@
+"""tracing.py - Lightweight Span Tracing
+
+SPANS:
+- tracer.span(name) times a block and nests under the current span (ContextVar),
+  so spans follow a request through awaits in the same task
+- Trace/span ids and timestamps follow the OpenTelemetry data model
+- A finished root span hands its whole trace to the exporters
+
+EXPORT:
+- FileSpanExporter appends one OTLP/JSON ExportTraceServiceRequest per line, the
+  format the OpenTelemetry Collector's otlpjsonfile receiver reads
+- server_timing() summarises a trace for the Server-Timing response header
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "livinglands-backend"
+
+@dataclass
+class Span:
+    """One timed operation within a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"  # internal | server | client
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    _root: Optional["Span"] = field(default=None, repr=False)
+    _finished: List["Span"] = field(default_factory=list, repr=False)  # Root only: ended spans
+
+    @property
+    def root(self) -> "Span":
+        return self._root or self
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def server_timing(self) -> Dict[str, float]:
+        """Milliseconds per span name across this span's trace (repeats summed), plus total"""
+        timings: Dict[str, float] = {}
+        for span in self.root._finished:
+            if span is not self.root:
+                timings[span.name] = timings.get(span.name, 0.0) + span.duration_ms()
+        timings["total"] = self.root.duration_ms()
+        return {name: round(ms, 2) for name, ms in timings.items()}
+
+    def server_timing_header(self) -> str:
+        """Server-Timing header value, e.g. 'interpret;dur=12.5, execute;dur=830.1'"""
+        return ", ".join(f"{_metric_token(name)};dur={ms}" for name, ms in self.server_timing().items())
+
+class Tracer:
+    """Creates spans and exports finished traces"""
+
+    def __init__(self, service_name: str = SERVICE_NAME):
+        self.service_name = service_name
+        self.exporters: List[Any] = []
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, root: bool = False,
+                   kind: str = "internal", **attributes) -> Span:
+        """Create a span without making it current (end it with end_span)"""
+        parent = None if root else (parent or self._current.get())
+        if parent is None:
+            return Span(name, trace_id=secrets.token_hex(16), span_id=secrets.token_hex(8),
+                        kind=kind, attributes=attributes)
+        return Span(name, trace_id=parent.trace_id, span_id=secrets.token_hex(8), parent_id=parent.span_id,
+                    kind=kind, attributes=attributes, _root=parent.root)
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        root = span.root
+        if root.end_ns is not None and span is not root:
+            return  # Outlived its trace (already exported)
+        root._finished.append(span)
+        if span is root:
+            self._export(root._finished)
+
+    @contextmanager
+    def span(self, name: str, root: bool = False, kind: str = "internal", **attributes) -> Iterator[Span]:
+        """Time a block as a child of the current span (or a new trace if root)"""
+        span = self.start_span(name, root=root, kind=kind, **attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self._current.reset(token)
+            self.end_span(span, error=e)
+            raise
+        self._current.reset(token)
+        self.end_span(span)
+
+    def _export(self, spans: List[Span]):
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans, self.service_name)
+            except Exception as e:
+                logger.error(f"Span export failed: {e}")
+
+class FileSpanExporter:
+    """Appends traces to a file as OTLP/JSON lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span], service_name: str):
+        line = json.dumps(to_otlp_json(spans, service_name), separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+def to_otlp_json(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for a batch of spans"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "livinglands.tracing"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": _SPAN_KINDS.get(span.kind, 1),
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+                } for span in spans]
+            }]
+        }]
+    }
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+def _metric_token(name: str) -> str:
+    """Server-Timing metric names are HTTP tokens"""
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name)
+
+# Global tracer
+tracer = Tracer()
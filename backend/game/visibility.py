@@ -0,0 +1,155 @@
+"""visibility.py - Fog of War and Line of Sight
+
+FIELD OF VIEW:
+- A party sees up to SIGHT_RADIUS hexes, further from high ground, less from
+  inside a forest
+- A hex is hidden when something on the straight hex line to it stands taller
+  than the viewer's eye: forest canopy, hills, crags and peaks
+- Hexes entering view for the first time are materialised from the world
+  generator and reported as newly revealed
+
+INCREMENTAL UPDATES:
+- Sight lines are translation-invariant, so the intermediate offsets for
+  every target are precomputed once per radius and reused from any origin
+- Each session keeps a window of terrain heights around the party; a one-hex
+  move only looks up the ring of hexes entering view and drops the ring
+  leaving it, instead of reading terrain for the whole field again
+- Windows are rebuilt after a jump, a change of sight radius or a terrain change
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from models import GameState, HexMap, hex_distance
+from game.metrics import metrics
+from game.world_gen import world_generator
+
+Coords = Tuple[int, int]
+
+view_updates = metrics.counter("visibility_updates", "Field-of-view updates by kind", ("kind",))
+
+SIGHT_RADIUS = 3
+SIGHT_BONUS = {"forest": -1, "hills": 1, "crags": 1, "peaks": 2}
+
+# How tall each landscape stands for line of sight (default 0 = open ground)
+HEIGHTS = {"forest": 1, "hills": 2, "crags": 3, "peaks": 4}
+# Viewer's eye level on each landscape (under the canopy a forest adds nothing)
+EYE_LEVELS = {"hills": 2, "crags": 3, "peaks": 4}
+
+def _cube_round(x: float, y: float, z: float) -> Coords:
+    rx, ry, rz = round(x), round(y), round(z)
+    dx, dy, dz = abs(rx - x), abs(ry - y), abs(rz - z)
+    if dx > dy and dx > dz:
+        rx = -ry - rz
+    elif dy > dz:
+        ry = -rx - rz
+    return rx, ry
+
+@lru_cache(maxsize=16)
+def sight_lines(radius: int) -> Tuple[Tuple[Coords, Tuple[Coords, ...]], ...]:
+    """(target offset, intermediate offsets) for every offset within radius, nearest first"""
+    lines = []
+    for dq, dr in sorted(HexMap.range(0, 0, radius), key=lambda o: hex_distance(o, (0, 0))):
+        steps = hex_distance((dq, dr), (0, 0))
+        between = []
+        for i in range(1, steps):
+            t = i / steps
+            # Nudge off exact edges so ties always resolve the same way
+            between.append(_cube_round(dq * t + 1e-6, dr * t + 2e-6, -(dq + dr) * t - 3e-6))
+        lines.append(((dq, dr), tuple(between)))
+    return tuple(lines)
+
+@dataclass
+class ViewState:
+    """A session's last field of view and the terrain window it was computed from"""
+    origin: Coords
+    radius: int
+    terrain_version: int
+    heights: Dict[Coords, int] = field(default_factory=dict)  # Absolute coords -> height
+    visible: Set[Coords] = field(default_factory=set)
+
+class VisibilityEngine:
+    """Computes and caches what each session's party can see"""
+
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self._views: "OrderedDict[str, ViewState]" = OrderedDict()
+
+    @staticmethod
+    def _landscape(game_state: GameState, seed: int, coords: Coords) -> str:
+        hex_obj = game_state.get_hex(*coords) or world_generator.hex_at(seed, *coords)
+        return hex_obj.landscape
+
+    def sight_radius(self, game_state: GameState, origin: Coords) -> int:
+        landscape = self._landscape(game_state, world_generator.seed_for(game_state), origin)
+        return max(1, SIGHT_RADIUS + SIGHT_BONUS.get(landscape, 0))
+
+    def _window(self, game_state: GameState, origin: Coords, radius: int,
+                previous: Optional[ViewState], terrain_version: int) -> Dict[Coords, int]:
+        """Terrain heights within radius of origin, shifted from the previous window when possible"""
+        seed = world_generator.seed_for(game_state)
+
+        def height(coords: Coords) -> int:
+            return HEIGHTS.get(self._landscape(game_state, seed, coords), 0)
+
+        if (previous is not None and previous.radius == radius and previous.terrain_version == terrain_version
+                and hex_distance(previous.origin, origin) == 1):
+            view_updates.inc(kind="incremental")
+            heights = previous.heights
+            for coords in HexMap.ring(*previous.origin, radius):
+                if hex_distance(coords, origin) > radius:
+                    heights.pop(coords, None)  # Left the window
+            for coords in HexMap.ring(*origin, radius):
+                if coords not in heights:
+                    heights[coords] = height(coords)  # Entered the window
+            return heights
+
+        view_updates.inc(kind="full")
+        return {coords: height(coords) for coords in HexMap.range(*origin, radius)}
+
+    def field_of_view(self, game_state: GameState) -> Set[Coords]:
+        """Hexes the party can currently see (updating the session's cached view)"""
+        origin = game_state.get_current_position()
+        terrain_version = game_state.section_versions.get("terrain", 0)
+        view = self._views.get(game_state.session_id)
+        if view is not None:
+            self._views.move_to_end(game_state.session_id)
+            if view.origin == origin and view.terrain_version == terrain_version:
+                return view.visible
+
+        radius = self.sight_radius(game_state, origin)
+        heights = self._window(game_state, origin, radius, view, terrain_version)
+        seed = world_generator.seed_for(game_state)
+        eye = EYE_LEVELS.get(self._landscape(game_state, seed, origin), 0)
+
+        oq, orr = origin
+        visible = set()
+        for (dq, dr), between in sight_lines(radius):
+            if all(heights[(oq + bq, orr + br)] <= eye for bq, br in between):
+                visible.add((oq + dq, orr + dr))
+
+        self._views[game_state.session_id] = ViewState(origin, radius, terrain_version, heights, visible)
+        while len(self._views) > self.max_sessions:
+            self._views.popitem(last=False)
+        return visible
+
+    def update(self, game_state: GameState) -> List[Coords]:
+        """Recompute the party's view, materialise newly seen hexes and record the view
+
+        Returns the coordinates revealed for the first time.
+        """
+        visible = self.field_of_view(game_state)
+        revealed = world_generator.materialise(game_state, sorted(visible))
+        game_state.world_data["visible"] = [list(coords) for coords in sorted(visible)]
+        return revealed
+
+    def forget(self, session_id: str):
+        self._views.pop(session_id, None)
+
+    def stats(self):
+        return {"cached_views": len(self._views), "max_sessions": self.max_sessions}
+
+# Global instance
+visibility = VisibilityEngine()
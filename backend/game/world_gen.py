@@ -0,0 +1,349 @@
+"""world_gen.py - Seeded Procedural Hex World
+
+DETERMINISTIC TERRAIN:
+- Every hex is a pure function of (world seed, q, r): nothing about the
+  undiscovered world is stored, any part of it can be regenerated on demand
+- Elevation and moisture come from fractal value noise over an integer hash,
+  landscape from the two combined; landmarks and omens from per-hex rolls
+- The hash is plain 64-bit integer arithmetic, so the NumPy path reproduces
+  the per-hex reference (generate_hex) bit for bit
+
+BULK GENERATION:
+- generate_region computes elevation, moisture, landscape and landmark/omen
+  rolls for a whole rectangle of hexes as NumPy arrays in one pass
+- A Region keeps only the arrays; Hex objects are materialised per hex, and
+  only for hexes a party actually visits or sees
+
+CHUNKED LAZY GENERATION:
+- The world is split into chunk_size x chunk_size axial parallelograms
+- A chunk is generated (as a Region) the first time any of its hexes comes
+  within view of a party (game/visibility.py), and kept in a bounded LRU
+  cache shared by all sessions
+- Evicted chunks are simply regenerated from the seed when needed again, so
+  world size is unbounded at constant generator memory
+"""
+
+import math
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from models import GameState, Hex
+from game.metrics import metrics
+
+chunk_lookups = metrics.counter("world_chunk_lookups", "World chunk cache lookups", ("outcome",))
+
+MASK64 = (1 << 64) - 1
+
+# Noise channels (salts) so elevation, moisture and feature rolls are independent
+ELEVATION, MOISTURE, LANDMARK, OMEN, FEATURE = 1, 2, 3, 4, 5
+
+LANDMARKS = [
+    "ruined tower", "standing stones", "abandoned chapel", "hollow oak", "old bridge",
+    "barrow mound", "hermit's hut", "burnt village", "toll house", "sunken shrine",
+]
+OMENS = [
+    "circling crows", "a weeping statue", "a riderless horse", "bells with no church",
+    "a red mist", "fresh graves", "a silent choir", "a broken sword in the road",
+]
+LANDMARK_CHANCE = 0.08
+OMEN_CHANCE = 0.04
+
+def mix64(value: int) -> int:
+    """SplitMix64 finaliser: avalanche a 64-bit integer"""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK64
+    return value ^ (value >> 31)
+
+def hash_coords(seed: int, channel: int, x: int, y: int) -> int:
+    """64-bit hash of an integer lattice point"""
+    value = (seed * 0x9E3779B97F4A7C15 + channel * 0xD1B54A32D192ED03) & MASK64
+    value = mix64(value ^ (x * 0xBF58476D1CE4E5B9 & MASK64))
+    return mix64(value ^ (y * 0x94D049BB133111EB & MASK64))
+
+def unit_hash(seed: int, channel: int, x: int, y: int) -> float:
+    """Hash of a lattice point as a float in [0, 1)"""
+    return (hash_coords(seed, channel, x, y) >> 11) * (1.0 / (1 << 53))
+
+def axial_to_plane(q: int, r: int) -> Tuple[float, float]:
+    """Centre of an axial hex on the plane (unit hex spacing), for isotropic noise"""
+    return q + r * 0.5, r * 0.8660254037844386
+
+def _fade(t: float) -> float:
+    return t * t * (3.0 - 2.0 * t)
+
+def value_noise(seed: int, channel: int, x: float, y: float) -> float:
+    """Smoothly interpolated lattice noise in [0, 1)"""
+    x0, y0 = math.floor(x), math.floor(y)
+    tx, ty = _fade(x - x0), _fade(y - y0)
+    a = unit_hash(seed, channel, x0, y0)
+    b = unit_hash(seed, channel, x0 + 1, y0)
+    c = unit_hash(seed, channel, x0, y0 + 1)
+    d = unit_hash(seed, channel, x0 + 1, y0 + 1)
+    top = a + (b - a) * tx
+    bottom = c + (d - c) * tx
+    return top + (bottom - top) * ty
+
+def fractal_noise(seed: int, channel: int, x: float, y: float,
+                  scale: float = 0.08, octaves: int = 3) -> float:
+    """Sum of noise octaves (each twice the frequency, half the weight), in [0, 1)"""
+    total, weight, norm = 0.0, 1.0, 0.0
+    for octave in range(octaves):
+        total += weight * value_noise(seed, channel * 16 + octave, x * scale, y * scale)
+        norm += weight
+        weight *= 0.5
+        scale *= 2.0
+    return total / norm
+
+# Vectorised equivalents (uint64 arithmetic wraps modulo 2**64 like the & MASK64 above)
+
+_U = np.uint64
+
+def _mix64_array(value: np.ndarray) -> np.ndarray:
+    value = (value ^ (value >> _U(30))) * _U(0xBF58476D1CE4E5B9)
+    value = (value ^ (value >> _U(27))) * _U(0x94D049BB133111EB)
+    return value ^ (value >> _U(31))
+
+def hash_coords_array(seed: int, channel: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """hash_coords over integer arrays"""
+    base = _U((seed * 0x9E3779B97F4A7C15 + channel * 0xD1B54A32D192ED03) & MASK64)
+    x = x.astype(np.int64).astype(np.uint64)
+    y = y.astype(np.int64).astype(np.uint64)
+    value = _mix64_array(base ^ (x * _U(0xBF58476D1CE4E5B9)))
+    return _mix64_array(value ^ (y * _U(0x94D049BB133111EB)))
+
+def unit_hash_array(seed: int, channel: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return (hash_coords_array(seed, channel, x, y) >> _U(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+def value_noise_array(seed: int, channel: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    x0, y0 = np.floor(x), np.floor(y)
+    tx, ty = _fade(x - x0), _fade(y - y0)
+    x0, y0 = x0.astype(np.int64), y0.astype(np.int64)
+    a = unit_hash_array(seed, channel, x0, y0)
+    b = unit_hash_array(seed, channel, x0 + 1, y0)
+    c = unit_hash_array(seed, channel, x0, y0 + 1)
+    d = unit_hash_array(seed, channel, x0 + 1, y0 + 1)
+    top = a + (b - a) * tx
+    bottom = c + (d - c) * tx
+    return top + (bottom - top) * ty
+
+def fractal_noise_array(seed: int, channel: int, x: np.ndarray, y: np.ndarray,
+                        scale: float = 0.08, octaves: int = 3) -> np.ndarray:
+    total, weight, norm = np.zeros_like(x), 1.0, 0.0
+    for octave in range(octaves):
+        total += weight * value_noise_array(seed, channel * 16 + octave, x * scale, y * scale)
+        norm += weight
+        weight *= 0.5
+        scale *= 2.0
+    return total / norm
+
+def classify_landscape(elevation: float, moisture: float) -> str:
+    """Landscape name for an elevation/moisture pair (both in [0, 1))"""
+    if elevation < 0.30:
+        return "lake"
+    if elevation < 0.38:
+        return "marsh" if moisture > 0.5 else "meadow"
+    if elevation < 0.58:
+        if moisture > 0.58:
+            return "forest"
+        return "heath" if moisture < 0.38 else "plains"
+    if elevation < 0.68:
+        return "forest" if moisture > 0.62 else "hills"
+    if elevation < 0.76:
+        return "crags"
+    return "peaks"
+
+LANDSCAPES = ["lake", "marsh", "meadow", "forest", "heath", "plains", "hills", "crags", "peaks"]
+_LANDSCAPE_CODES = {name: code for code, name in enumerate(LANDSCAPES)}
+
+def classify_landscape_array(elevation: np.ndarray, moisture: np.ndarray) -> np.ndarray:
+    """classify_landscape over arrays, as indices into LANDSCAPES"""
+    code = _LANDSCAPE_CODES
+    conditions = [
+        elevation < 0.30,
+        (elevation < 0.38) & (moisture > 0.5),
+        elevation < 0.38,
+        (elevation < 0.58) & (moisture > 0.58),
+        (elevation < 0.58) & (moisture < 0.38),
+        elevation < 0.58,
+        (elevation < 0.68) & (moisture > 0.62),
+        elevation < 0.68,
+        elevation < 0.76,
+    ]
+    choices = ["lake", "marsh", "meadow", "forest", "heath", "plains", "forest", "hills", "crags"]
+    return np.select(conditions, [code[name] for name in choices], default=code["peaks"]).astype(np.uint8)
+
+@dataclass
+class Region:
+    """Generated terrain for a width x height rectangle of axial coordinates
+
+    Arrays are indexed [q - q0, r - r0]. landmark/omen hold indices into
+    LANDMARKS/OMENS, or -1 for none.
+    """
+    seed: int
+    q0: int
+    r0: int
+    width: int
+    height: int
+    elevation: np.ndarray
+    moisture: np.ndarray
+    landscape: np.ndarray
+    landmark: np.ndarray
+    omen: np.ndarray
+
+    def __contains__(self, coords: Tuple[int, int]) -> bool:
+        return 0 <= coords[0] - self.q0 < self.width and 0 <= coords[1] - self.r0 < self.height
+
+    def __len__(self) -> int:
+        return self.width * self.height
+
+    def hex_at(self, q: int, r: int) -> Hex:
+        """Materialise one hex as a fresh Hex object"""
+        i, j = q - self.q0, r - self.r0
+        landmark, omen = int(self.landmark[i, j]), int(self.omen[i, j])
+        return Hex(q=q, r=r, landscape=LANDSCAPES[self.landscape[i, j]],
+                   landmark=LANDMARKS[landmark] if landmark >= 0 else None,
+                   omen=OMENS[omen] if omen >= 0 else None)
+
+    def features(self) -> List[Tuple[int, int]]:
+        """Coordinates holding a landmark or an omen"""
+        i, j = np.nonzero((self.landmark >= 0) | (self.omen >= 0))
+        return list(zip((i + self.q0).tolist(), (j + self.r0).tolist()))
+
+    def landscape_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.landscape.ravel(), minlength=len(LANDSCAPES))
+        return {name: int(count) for name, count in zip(LANDSCAPES, counts) if count}
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.elevation, self.moisture, self.landscape, self.landmark, self.omen))
+
+def generate_region(seed: int, q0: int, r0: int, width: int, height: int) -> Region:
+    """Generate a whole rectangle of terrain in one vectorised pass"""
+    q, r = np.meshgrid(np.arange(q0, q0 + width, dtype=np.int64),
+                       np.arange(r0, r0 + height, dtype=np.int64), indexing="ij")
+    x = q + r * 0.5
+    y = r * 0.8660254037844386
+    elevation = fractal_noise_array(seed, ELEVATION, x, y)
+    moisture = fractal_noise_array(seed, MOISTURE, x, y, scale=0.11)
+    landscape = classify_landscape_array(elevation, moisture)
+
+    # Landmark and omen probabilities per hex (none on open water)
+    land = landscape != _LANDSCAPE_CODES["lake"]
+    has_landmark = land & (unit_hash_array(seed, LANDMARK, q, r) < LANDMARK_CHANCE)
+    has_omen = land & (unit_hash_array(seed, OMEN, q, r) < OMEN_CHANCE)
+    landmark_pick = (hash_coords_array(seed, FEATURE, q, r) % _U(len(LANDMARKS))).astype(np.int8)
+    omen_pick = (hash_coords_array(seed, FEATURE + 1, q, r) % _U(len(OMENS))).astype(np.int8)
+    landmark = np.where(has_landmark, landmark_pick, np.int8(-1))
+    omen = np.where(has_omen, omen_pick, np.int8(-1))
+
+    return Region(seed, q0, r0, width, height,
+                  elevation=elevation.astype(np.float32), moisture=moisture.astype(np.float32),
+                  landscape=landscape, landmark=landmark, omen=omen)
+
+class WorldGenerator:
+    """Lazily generates hexes from a world seed, chunk by chunk"""
+
+    def __init__(self, chunk_size: int = 8, max_chunks: int = 512):
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self._chunks: "OrderedDict[Tuple[int, int, int], Region]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Single hexes
+
+    @staticmethod
+    def generate_hex(seed: int, q: int, r: int) -> Hex:
+        """The pristine hex at (q, r) for a seed (pure: same inputs, same hex)
+
+        Per-hex reference implementation; chunks use the vectorised generate_region.
+        """
+        x, y = axial_to_plane(q, r)
+        elevation = fractal_noise(seed, ELEVATION, x, y)
+        moisture = fractal_noise(seed, MOISTURE, x, y, scale=0.11)
+        landscape = classify_landscape(elevation, moisture)
+
+        landmark = omen = None
+        if landscape != "lake":
+            if unit_hash(seed, LANDMARK, q, r) < LANDMARK_CHANCE:
+                landmark = LANDMARKS[hash_coords(seed, FEATURE, q, r) % len(LANDMARKS)]
+            if unit_hash(seed, OMEN, q, r) < OMEN_CHANCE:
+                omen = OMENS[hash_coords(seed, FEATURE + 1, q, r) % len(OMENS)]
+        return Hex(q=q, r=r, landscape=landscape, landmark=landmark, omen=omen)
+
+    # Chunks
+
+    def chunk_of(self, q: int, r: int) -> Tuple[int, int]:
+        """Chunk coordinates containing a hex"""
+        return q // self.chunk_size, r // self.chunk_size
+
+    def generate_chunk(self, seed: int, cq: int, cr: int) -> Region:
+        """Generate a chunk from the seed (uncached)"""
+        size = self.chunk_size
+        return generate_region(seed, cq * size, cr * size, size, size)
+
+    def chunk(self, seed: int, cq: int, cr: int) -> Region:
+        """A chunk's terrain, from the LRU cache or freshly generated"""
+        key = (seed, cq, cr)
+        hexes = self._chunks.get(key)
+        if hexes is not None:
+            self._chunks.move_to_end(key)
+            self.hits += 1
+            chunk_lookups.inc(outcome="hit")
+            return hexes
+
+        self.misses += 1
+        chunk_lookups.inc(outcome="miss")
+        hexes = self.generate_chunk(seed, cq, cr)
+        self._chunks[key] = hexes
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+        return hexes
+
+    def hex_at(self, seed: int, q: int, r: int) -> Hex:
+        """A fresh Hex for the pristine terrain at (q, r)"""
+        return self.chunk(seed, *self.chunk_of(q, r)).hex_at(q, r)
+
+    # Sessions
+
+    @staticmethod
+    def seed_for(game_state: GameState) -> int:
+        """The session's world seed (sessions created before seeding get one from their id)"""
+        seed = game_state.world_data.get("world_seed")
+        if seed is None:
+            seed = zlib.crc32(game_state.session_id.encode("utf-8"))
+            game_state.world_data["world_seed"] = seed
+        return seed
+
+    def materialise(self, game_state: GameState, coords: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Add the pristine hexes for any of these coordinates the session's map lacks
+
+        Returns the coordinates that were newly added.
+        """
+        seed = self.seed_for(game_state)
+        added = []
+        for q, r in coords:
+            if (q, r) not in game_state.hex_map:
+                game_state.hex_map.set(self.hex_at(seed, q, r))
+                added.append((q, r))
+        if added:
+            game_state.touch("hexes")
+        return added
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "chunk_size": self.chunk_size,
+            "cached_chunks": len(self._chunks),
+            "cached_bytes": sum(region.nbytes() for region in self._chunks.values()),
+            "max_chunks": self.max_chunks,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+# Global generator (its chunk cache is shared by every session)
+world_generator = WorldGenerator()
@@ -8,11 +8,16 @@ CLEAN SETUP:
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import logging
 import os
 
 from api.routes import router as api_router
+from game.ollama_client import ollama
+from game.flow_controller import game_controller
+from game.metrics import metrics
+from game.tracing import tracer, FileSpanExporter
 
 # Setup logging
 logging.basicConfig(
@@ -35,8 +40,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Optional trace export: TRACE_FILE=traces/otlp.jsonl (OTLP/JSON lines, one trace per line)
+trace_file = os.getenv("TRACE_FILE")
+if trace_file:
+    tracer.add_exporter(FileSpanExporter(trace_file))
+    logger.info(f"Exporting traces to {trace_file}")
+
+# Opt-in completion cache: OLLAMA_CACHE=memory or OLLAMA_CACHE=disk
+cache_mode = os.getenv("OLLAMA_CACHE", "").lower()
+if cache_mode in ("memory", "disk"):
+    ollama.enable_cache(disk=(cache_mode == "disk"))
+    logger.info(f"LLM completion cache enabled ({cache_mode})")
+
+# Extra Ollama servers: OLLAMA_ENDPOINTS=http://gpu-1:11434,http://gpu-2:11434
+for url in filter(None, (u.strip() for u in os.getenv("OLLAMA_ENDPOINTS", "").split(","))):
+    if url != ollama.base_url:
+        ollama.add_endpoint(url)
+
+# Per-template models: OLLAMA_TEMPLATE_MODELS=action_interpreter=qwen2.5:1.5b;gamemaster=tohur:latest
+for entry in filter(None, os.getenv("OLLAMA_TEMPLATE_MODELS", "").split(";")):
+    template_name, _, models = entry.partition("=")
+    ollama.prefer_models(template_name.strip(), *(m.strip() for m in models.split(",") if m.strip()))
+
+# Start write-behind session persistence and endpoint health checks
+@app.on_event("startup")
+async def start_game_controller():
+    game_controller.start()
+    ollama.start()
+
+# Flush sessions and release pooled Ollama connections on shutdown
+@app.on_event("shutdown")
+async def shutdown_services():
+    await game_controller.shutdown()
+    await ollama.aclose()
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -51,7 +91,12 @@ async def api_info():
             "new_game": "/api/v1/new-game",
             "action": "/api/v1/action", 
             "sessions": "/api/v1/sessions",
-            "health": "/api/v1/health"
+            "health": "/api/v1/health",
+            "input": "/api/v1/input",
+            "input_stream": "/api/v1/input/stream",
+            "stats": "/api/v1/stats",
+            "recent_llm_calls": "/api/v1/stats/calls",
+            "metrics": "/metrics"
         },
         "development": {
             "templates": "/api/v1/templates",
@@ -60,6 +105,11 @@ async def api_info():
         }
     }
 
+# Prometheus scrape endpoint (all registered metrics)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # Serve frontend (must be last)
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
 if os.path.exists(frontend_path):
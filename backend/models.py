@@ -7,17 +7,43 @@ SIMPLE GAME STATE:
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator, NamedTuple, Set
 from datetime import datetime
+from collections import deque
+import copy
+import random
+import uuid
 from backend.game.dice_roller import roll_dice
 
-@dataclass
+# Hot history window kept in memory; older turns roll into GameState.history_summary
+HISTORY_WINDOW = 20
+
+# Most evicted turns waiting for the chronicler; beyond this the oldest are dropped
+# from memory (the actions table still has them) so a summariser outage stays bounded
+SUMMARY_BACKLOG_LIMIT = 50
+
+# How many per-turn deltas a GameState keeps before clients need a full snapshot
+DELTA_WINDOW = 32
+
+# Axial hex directions, clockwise from east
+HEX_DIRECTIONS: List[Tuple[int, int]] = [
+    (1, 0), (1, -1), (0, -1),
+    (-1, 0), (-1, 1), (0, 1)
+]
+
+def hex_distance(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    """Number of steps between two axial coordinates"""
+    dq = a[0] - b[0]
+    dr = a[1] - b[1]
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+@dataclass(slots=True)
 class Hex:
     """Hex tile for the world map"""
     q: int  # Column coordinate
     r: int  # Row coordinate  
-    explored: bool = False
     landscape: str
+    explored: bool = False
     landmark: Optional[str] = None
     omen: Optional[str] = None
     
@@ -45,13 +71,235 @@ class Hex:
             omen=data.get("omen"),
         )
 
+# Feature kinds the HexMap indexes from its hexes (NPCs are indexed by GameState)
+HEX_FEATURES = ("landmark", "omen")
+
+class Feature(NamedTuple):
+    """Something worth finding at a hex: a landmark, an omen or an NPC"""
+    kind: str
+    name: str
+    q: int
+    r: int
+
+class SpatialIndex:
+    """Point features bucketed on a coarse axial grid
+
+    Range, ring and nearest queries only visit the buckets overlapping the
+    search area, so their cost depends on the radius and on how many features
+    are near, not on how large the map has grown.
+    """
+    __slots__ = ("bucket_size", "_buckets", "_count", "_extent")
+
+    def __init__(self, bucket_size: int = 8):
+        self.bucket_size = bucket_size
+        # bucket -> coords -> {(kind, name)}
+        self._buckets: Dict[Tuple[int, int], Dict[Tuple[int, int], Set[Tuple[str, str]]]] = {}
+        self._count = 0
+        self._extent: Optional[Tuple[int, int, int, int]] = None  # Bucket bounds ever used (min/max q, r)
+
+    def _bucket(self, q: int, r: int) -> Tuple[int, int]:
+        return q // self.bucket_size, r // self.bucket_size
+
+    def add(self, kind: str, name: str, q: int, r: int):
+        bq, br = self._bucket(q, r)
+        entries = self._buckets.setdefault((bq, br), {}).setdefault((q, r), set())
+        if self._extent is None:
+            self._extent = (bq, bq, br, br)
+        else:
+            low_q, high_q, low_r, high_r = self._extent
+            self._extent = (min(low_q, bq), max(high_q, bq), min(low_r, br), max(high_r, br))
+        if (kind, name) not in entries:
+            entries.add((kind, name))
+            self._count += 1
+
+    def remove(self, kind: str, name: str, q: int, r: int):
+        self._discard(q, r, lambda entry: entry == (kind, name))
+
+    def clear_hex(self, q: int, r: int, kinds: Iterable[str]):
+        """Remove every feature of these kinds at a hex"""
+        kinds = set(kinds)
+        self._discard(q, r, lambda entry: entry[0] in kinds)
+
+    def _discard(self, q: int, r: int, matches):
+        bucket_key = self._bucket(q, r)
+        bucket = self._buckets.get(bucket_key)
+        entries = bucket.get((q, r)) if bucket else None
+        if not entries:
+            return
+        for entry in [entry for entry in entries if matches(entry)]:
+            entries.discard(entry)
+            self._count -= 1
+        if not entries:
+            del bucket[(q, r)]
+            if not bucket:
+                del self._buckets[bucket_key]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def at(self, q: int, r: int, kinds: Optional[Iterable[str]] = None) -> List[Feature]:
+        """Features at one hex"""
+        return self.in_range(q, r, 0, kinds)
+
+    def _scan(self, buckets: Iterable[Tuple[int, int]], q: int, r: int, radius: int,
+              kinds: Optional[Set[str]]) -> Iterator[Tuple[int, Feature]]:
+        """(distance, feature) for matching features in these buckets within radius"""
+        for bucket_key in buckets:
+            bucket = self._buckets.get(bucket_key)
+            if not bucket:
+                continue
+            for (fq, fr), entries in bucket.items():
+                distance = hex_distance((q, r), (fq, fr))
+                if distance > radius:
+                    continue
+                for kind, name in entries:
+                    if kinds is None or kind in kinds:
+                        yield distance, Feature(kind, name, fq, fr)
+
+    @staticmethod
+    def _kinds(kinds: Optional[Iterable[str]]) -> Optional[Set[str]]:
+        if kinds is None:
+            return None
+        return {kinds} if isinstance(kinds, str) else set(kinds)
+
+    def in_range(self, q: int, r: int, radius: int, kinds: Optional[Iterable[str]] = None) -> List[Feature]:
+        """Features within `radius` steps, nearest first"""
+        low_q, low_r = self._bucket(q - radius, r - radius)
+        high_q, high_r = self._bucket(q + radius, r + radius)
+        buckets = ((bq, br) for bq in range(low_q, high_q + 1) for br in range(low_r, high_r + 1))
+        found = sorted(self._scan(buckets, q, r, radius, self._kinds(kinds)))
+        return [feature for _, feature in found]
+
+    def in_ring(self, q: int, r: int, radius: int, kinds: Optional[Iterable[str]] = None) -> List[Feature]:
+        """Features exactly `radius` steps away"""
+        return [f for f in self.in_range(q, r, radius, kinds) if hex_distance((q, r), (f.q, f.r)) == radius]
+
+    def nearest(self, q: int, r: int, kinds: Optional[Iterable[str]] = None,
+                max_radius: Optional[int] = None) -> Optional[Feature]:
+        """Closest feature (ties broken by coordinates), searching outwards ring by ring of buckets"""
+        if not self._count:
+            return None
+        kinds = self._kinds(kinds)
+        size = self.bucket_size
+        bq, br = self._bucket(q, r)
+        low_q, high_q, low_r, high_r = self._extent
+        reach = max(bq - low_q, high_q - bq, br - low_r, high_r - br, 0)
+        limit = max_radius if max_radius is not None else float("inf")
+
+        best: Optional[Tuple[int, Feature]] = None
+        for k in range(reach + 1):
+            if k == 0:
+                ring = [(bq, br)]
+            else:
+                ring = [(bq + i, br + j) for i in range(-k, k + 1) for j in range(-k, k + 1)
+                        if max(abs(i), abs(j)) == k]
+            for candidate in self._scan(ring, q, r, limit, kinds):
+                if best is None or candidate < best:
+                    best = candidate
+            # Anything in an unsearched bucket is at least k * size + 1 steps away
+            floor = k * size + 1
+            if (best is not None and best[0] < floor) or floor > limit:
+                break
+        return best[1] if best else None
+
+class HexMap:
+    """Hex storage keyed on axial (q, r) tuples
+
+    Holds Hex objects directly; the string-keyed {"q,r": {...}} form is only
+    produced at the API/persistence boundary via to_dict/from_dict.
+    """
+    __slots__ = ("_hexes", "_dirty", "features")
+
+    def __init__(self, hexes: Iterable[Hex] = ()):
+        self._hexes: Dict[Tuple[int, int], Hex] = {(h.q, h.r): h for h in hexes}
+        self._dirty: Set[Tuple[int, int]] = set(self._hexes)
+        self.features = SpatialIndex()  # Landmarks and omens of stored hexes (plus NPCs, see GameState)
+        for hex_obj in self._hexes.values():
+            self._index(hex_obj)
+
+    def _index(self, hex_obj: Hex):
+        """Bring the feature index in line with a hex's landmark and omen"""
+        self.features.clear_hex(hex_obj.q, hex_obj.r, HEX_FEATURES)
+        if hex_obj.landmark:
+            self.features.add("landmark", hex_obj.landmark, hex_obj.q, hex_obj.r)
+        if hex_obj.omen:
+            self.features.add("omen", hex_obj.omen, hex_obj.q, hex_obj.r)
+
+    def get(self, q: int, r: int) -> Optional[Hex]:
+        """Get the stored hex at coordinates"""
+        return self._hexes.get((q, r))
+
+    def set(self, hex_obj: Hex):
+        """Store (or replace) a hex"""
+        self._hexes[(hex_obj.q, hex_obj.r)] = hex_obj
+        self._dirty.add((hex_obj.q, hex_obj.r))
+        self._index(hex_obj)
+
+    def mark_dirty(self, q: int, r: int):
+        """Record an in-place change to a stored hex"""
+        self._dirty.add((q, r))
+        if (q, r) in self._hexes:
+            self._index(self._hexes[(q, r)])
+
+    def pop_dirty(self) -> Set[Tuple[int, int]]:
+        """Coordinates changed since the last call"""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def __contains__(self, coords: Tuple[int, int]) -> bool:
+        return coords in self._hexes
+
+    def __len__(self) -> int:
+        return len(self._hexes)
+
+    def __iter__(self) -> Iterator[Hex]:
+        return iter(self._hexes.values())
+
+    @staticmethod
+    def neighbours(q: int, r: int) -> List[Tuple[int, int]]:
+        """The six adjacent coordinates"""
+        return [(q + dq, r + dr) for dq, dr in HEX_DIRECTIONS]
+
+    @staticmethod
+    def ring(q: int, r: int, radius: int) -> List[Tuple[int, int]]:
+        """Coordinates exactly `radius` steps away"""
+        if radius == 0:
+            return [(q, r)]
+        results = []
+        # Start radius steps to the south-west, then walk each of the six sides
+        cq, cr = q + HEX_DIRECTIONS[4][0] * radius, r + HEX_DIRECTIONS[4][1] * radius
+        for dq, dr in HEX_DIRECTIONS:
+            for _ in range(radius):
+                results.append((cq, cr))
+                cq, cr = cq + dq, cr + dr
+        return results
+
+    @staticmethod
+    def range(q: int, r: int, radius: int) -> List[Tuple[int, int]]:
+        """Coordinates within `radius` steps (inclusive)"""
+        results = []
+        for dq in range(-radius, radius + 1):
+            for dr in range(max(-radius, -dq - radius), min(radius, -dq + radius) + 1):
+                results.append((q + dq, r + dr))
+        return results
+
+    def hexes_in_range(self, q: int, r: int, radius: int) -> List[Hex]:
+        """Stored hexes within `radius` steps"""
+        return [h for coords in self.range(q, r, radius) if (h := self._hexes.get(coords))]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """String-keyed JSON form used by the API and persistence"""
+        return {f"{q},{r}": h.to_dict() for (q, r), h in self._hexes.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, Any]]) -> 'HexMap':
+        """Rebuild from the string-keyed JSON form"""
+        return cls(Hex.from_dict(hex_data) for hex_data in data.values())
+
 @dataclass
 class Character:
     """Simple character representation"""
     name: str
-    description: Optional[str] = None
-    player_party: Optional[bool] = None
-    # age: Optional[int] = None
 
     full_vigour: int
     full_clarity: int
@@ -66,9 +314,55 @@ class Character:
     fatigued: bool
     feats: List[str]
     scars: List[str]
+    description: Optional[str] = None
+    player_party: Optional[bool] = None
+    # age: Optional[int] = None
     inventory: List[str] = field(default_factory=list)
     status: Dict[str, Any] = field(default_factory=dict)  # Wounds, conditions, etc.
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Full character record for persistence"""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "player_party": self.player_party,
+            "full_vigour": self.full_vigour,
+            "full_clarity": self.full_clarity,
+            "full_spirit": self.full_spirit,
+            "full_guard": self.full_guard,
+            "vigour": self.vigour,
+            "clarity": self.clarity,
+            "spirit": self.spirit,
+            "guard": self.guard,
+            "fatigued": self.fatigued,
+            "feats": list(self.feats),
+            "scars": list(self.scars),
+            "inventory": list(self.inventory),
+            "status": dict(self.status),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Character':
+        """Create Character from a persisted record"""
+        return cls(
+            name=data["name"],
+            description=data.get("description"),
+            player_party=data.get("player_party"),
+            full_vigour=data["full_vigour"],
+            full_clarity=data["full_clarity"],
+            full_spirit=data["full_spirit"],
+            full_guard=data["full_guard"],
+            vigour=data["vigour"],
+            clarity=data["clarity"],
+            spirit=data["spirit"],
+            guard=data["guard"],
+            fatigued=data.get("fatigued", False),
+            feats=data.get("feats", []),
+            scars=data.get("scars", []),
+            inventory=data.get("inventory", []),
+            status=data.get("status", {}),
+        )
+    
     def get_stat(self, stat_name: str, default: int = 0) -> int:
         """Get a character stat with default value"""
         stat_map = {
@@ -102,19 +396,68 @@ class GameState:
     recent_user_intent: str = field(default_factory=str)
     characters: List[Character] = field(default_factory=list)
     world_data: Dict[str, Any] = field(default_factory=dict)  # Current location, discovered areas, etc.
+    hex_map: HexMap = field(default_factory=HexMap)  # Discovered hexes
     game_data: Dict[str, Any] = field(default_factory=dict)   # Turn count, active events, etc.
-    history: List[Dict[str, Any]] = field(default_factory=list)  # Action history for context
+    history: deque = field(default_factory=lambda: deque(maxlen=HISTORY_WINDOW))  # Recent actions (ring buffer)
+    history_summary: str = ""  # Condensed memory of turns that left the ring buffer
+    summary_backlog: List[Dict[str, Any]] = field(default_factory=list)  # Evicted turns not yet summarised
+    pending_actions: List[Dict[str, Any]] = field(default_factory=list)  # Turns not yet written to the actions table
     created_at: datetime = field(default_factory=datetime.now)
     
+    # Versioned per-turn deltas for the API (in-memory only, not persisted)
+    version: int = 0
+    state_epoch: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    history_count: int = 0  # Entries ever added; history itself may be trimmed
+    _deltas: deque = field(default_factory=lambda: deque(maxlen=DELTA_WINDOW), repr=False, compare=False)
+    _last_sent: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    
+    # Dirty tracking for derived data such as prompt context (see game/context_builder.py)
+    section_versions: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    context_cache: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    
+    def __post_init__(self):
+        if not isinstance(self.history, deque) or self.history.maxlen != HISTORY_WINDOW:
+            self.history = deque(self.history, maxlen=HISTORY_WINDOW)
+        for name, pos in self.world_data.get("npcs", {}).items():
+            self.hex_map.features.add("npc", name, pos["q"], pos["r"])
+    
+    def touch(self, *sections: str):
+        """Mark sections ("character", "location", "hexes", "terrain", "npcs", "history") as changed"""
+        for section in sections:
+            self.section_versions[section] = self.section_versions.get(section, 0) + 1
+    
     def add_history_entry(self, action: str, result: str, context: Dict[str, Any] = None):
-        """Add an entry to the game history"""
+        """Add an entry to the game history
+
+        Entries are kept compact (intent only, not the full action context). The
+        oldest entry leaves the ring buffer into summary_backlog, and every entry is
+        queued in pending_actions for the actions table.
+        """
+        self.history_count += 1
         entry = {
+            "turn": self.history_count,
             "action": action,
             "result": result,
-            "context": context or {},
-            "timestamp": datetime.now()
+            "intent": (context or {}).get("intent", ""),
+            "timestamp": datetime.now().isoformat()
         }
+        if len(self.history) == self.history.maxlen:
+            self.summary_backlog.append(self.history[0])
+            del self.summary_backlog[:-SUMMARY_BACKLOG_LIMIT]
         self.history.append(entry)
+        self.pending_actions.append(entry)
+        self.touch("history")
+    
+    def recent_history(self, count: int) -> List[Dict[str, Any]]:
+        """The last `count` history entries, oldest first"""
+        if count <= 0:
+            return []
+        return list(self.history)[-count:]
+    
+    def drain_pending_actions(self) -> List[Dict[str, Any]]:
+        """Take the entries still waiting to be written to the actions table"""
+        pending, self.pending_actions = self.pending_actions, []
+        return pending
     
     def get_main_character(self) -> Optional[Character]:
         """Get the first character (main character)"""
@@ -128,49 +471,202 @@ class GameState:
     def set_position(self, q: int, r: int):
         """Set current hex position"""
         self.world_data["position"] = {"q": q, "r": r}
+        self.touch("location")
     
     def get_hex(self, q: int, r: int) -> Optional[Hex]:
         """Get hex at coordinates"""
-        hex_key = f"{q},{r}"
-        hex_data = self.world_data.get("hexes", {}).get(hex_key)
-        if hex_data:
-            return Hex.from_dict(hex_data)
-        return None
+        return self.hex_map.get(q, r)
     
     def set_hex(self, hex_obj: Hex):
         """Store hex data"""
-        hex_key = f"{hex_obj.q},{hex_obj.r}"
-        if "hexes" not in self.world_data:
-            self.world_data["hexes"] = {}
-        self.world_data["hexes"][hex_key] = hex_obj.to_dict()
+        previous = self.hex_map.get(hex_obj.q, hex_obj.r)
+        self.hex_map.set(hex_obj)
+        self.touch("hexes")
+        if previous is None or previous.landscape != hex_obj.landscape:
+            self.touch("terrain")  # Invalidates cached routes (game/pathfinding.py)
     
     def mark_hex_explored(self, q: int, r: int):
         """Mark a hex as explored"""
-        hex_obj = self.get_hex(q, r)
+        hex_obj = self.hex_map.get(q, r)
         if hex_obj:
             hex_obj.explored = True
+            self.hex_map.mark_dirty(q, r)
         else:
-            hex_obj = Hex(q=q, r=r, explored=True, landscape="unexplored")
-        self.set_hex(hex_obj)
+            self.hex_map.set(Hex(q=q, r=r, explored=True, landscape="unexplored"))
+        self.touch("hexes")
+    
+    def place_npc(self, name: str, q: int, r: int):
+        """Put an NPC at a hex (moving it if already placed)"""
+        npcs = self.world_data.setdefault("npcs", {})
+        previous = npcs.get(name)
+        if previous:
+            self.hex_map.features.remove("npc", name, previous["q"], previous["r"])
+        npcs[name] = {"q": q, "r": r}
+        self.hex_map.features.add("npc", name, q, r)
+        self.touch("npcs")
+    
+    def remove_npc(self, name: str):
+        """Take an NPC off the map"""
+        previous = self.world_data.get("npcs", {}).pop(name, None)
+        if previous:
+            self.hex_map.features.remove("npc", name, previous["q"], previous["r"])
+            self.touch("npcs")
+    
+    def features_near(self, radius: int, kinds: Optional[Iterable[str]] = None) -> List[Feature]:
+        """Landmarks, omens and NPCs within `radius` of the party, nearest first"""
+        return self.hex_map.features.in_range(*self.get_current_position(), radius, kinds)
+    
+    def world_data_with_hexes(self) -> Dict[str, Any]:
+        """world_data including the string-keyed hex map (API/persistence form)"""
+        return {**self.world_data, "hexes": self.hex_map.to_dict()}
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Full JSON-safe state for persistence (unlike to_dict, nothing is trimmed)"""
+        return {
+            "session_id": self.session_id,
+            "time_of_day": self.time_of_day,
+            "recent_user_intent": self.recent_user_intent,
+            "characters": [c.to_dict() for c in self.characters],
+            "world_data": self.world_data_with_hexes(),
+            "game_data": self.game_data,
+            "history": list(self.history),
+            "history_count": self.history_count,
+            "history_summary": self.history_summary,
+            "summary_backlog": self.summary_backlog,
+            "created_at": self.created_at.isoformat()
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any]) -> 'GameState':
+        """Rebuild a GameState from to_snapshot() output"""
+        world_data = dict(data.get("world_data", {}))
+        hex_map = HexMap.from_dict(world_data.pop("hexes", {}))
+        return cls(
+            session_id=data["session_id"],
+            time_of_day=data.get("time_of_day", "morning"),
+            recent_user_intent=data.get("recent_user_intent") or "",
+            characters=[Character.from_dict(c) for c in data.get("characters", [])],
+            world_data=world_data,
+            hex_map=hex_map,
+            game_data=data.get("game_data", {}),
+            history=deque(data.get("history", []), maxlen=HISTORY_WINDOW),
+            history_count=data.get("history_count", len(data.get("history", []))),
+            history_summary=data.get("history_summary", ""),
+            summary_backlog=data.get("summary_backlog", []),
+            created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else datetime.now()
+        )
+
+    @staticmethod
+    def _public_character(c: Character) -> Dict[str, Any]:
+        """Character fields exposed to the client"""
+        return {
+            "name": c.name,
+            "vigour": c.vigour,
+            "clarity": c.clarity,
+            "spirit": c.spirit,
+            "guard": c.guard,
+            "inventory": c.inventory,
+            "status": c.status
+        }
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
         return {
             "session_id": self.session_id,
-            "characters": [{
-                "name": c.name,
-                "vigour": c.vigour,
-                "clarity": c.clarity,
-                "spirit": c.spirit,
-                "guard": c.guard,
-                "inventory": c.inventory,
-                "status": c.status
-            } for c in self.characters],
-            "world_data": self.world_data,
+            "characters": [self._public_character(c) for c in self.characters],
+            "world_data": self.world_data_with_hexes(),
             "game_data": self.game_data,
-            "history": self.history[-10:],  # Last 10 entries only
+            "history": self.recent_history(10),  # Last 10 entries only
             "created_at": self.created_at.isoformat()
         }
+    
+    def commit_version(self) -> int:
+        """Close the current turn: record what changed since the last commit as a new version"""
+        characters = [self._public_character(c) for c in self.characters]
+        last = self._last_sent
+        delta: Dict[str, Any] = {}
+        
+        dirty_hexes = self.hex_map.pop_dirty()
+        if dirty_hexes:
+            delta["hexes"] = {f"{q},{r}": self.hex_map.get(q, r).to_dict()
+                              for q, r in dirty_hexes if (q, r) in self.hex_map}
+        
+        if len(characters) != len(last.get("characters", [])):
+            delta["characters"] = {i: c for i, c in enumerate(characters)}
+            delta["character_count"] = len(characters)
+        else:
+            changed = {}
+            for i, (now, before) in enumerate(zip(characters, last["characters"])):
+                fields = {k: v for k, v in now.items() if before.get(k) != v}
+                if fields:
+                    changed[i] = fields
+            if changed:
+                delta["characters"] = changed
+        
+        for section, current in (("world_data", self.world_data), ("game_data", self.game_data)):
+            before = last.get(section, {})
+            changed = {k: v for k, v in current.items() if before.get(k) != v}
+            removed = [k for k in before if k not in current]
+            if changed:
+                delta[section] = changed
+            if removed:
+                delta[f"{section}_removed"] = removed
+        
+        new_entries = self.history_count - last.get("history_count", 0)
+        if new_entries > 0:
+            delta["history"] = self.recent_history(new_entries)
+        
+        self._last_sent = copy.deepcopy({
+            "characters": characters,
+            "world_data": self.world_data,
+            "game_data": self.game_data,
+        })
+        self._last_sent["history_count"] = self.history_count
+        
+        # Catch direct mutations made without touch() before the next turn reads them
+        if "characters" in delta:
+            self.touch("character")
+        if "world_data" in delta or "world_data_removed" in delta:
+            self.touch("location")
+        
+        if delta:
+            self.version += 1
+            self._deltas.append((self.version, delta))
+        return self.version
+    
+    def delta_since(self, client_version: Optional[int], client_epoch: Optional[str] = None) -> Dict[str, Any]:
+        """State update for a client at client_version: merged deltas, or a full snapshot if too far behind"""
+        header = {"version": self.version, "state_epoch": self.state_epoch}
+        oldest_base = self._deltas[0][0] - 1 if self._deltas else self.version
+        
+        if (client_version is None or client_epoch != self.state_epoch
+                or client_version > self.version or client_version < oldest_base):
+            return {**self.to_dict(), **header, "full": True}
+        
+        merged: Dict[str, Any] = {}
+        for version, delta in self._deltas:
+            if version <= client_version:
+                continue
+            for key, value in delta.items():
+                if key == "history":
+                    merged.setdefault("history", []).extend(value)
+                elif key == "characters":
+                    characters = merged.setdefault("characters", {})
+                    for index, fields in value.items():
+                        characters.setdefault(index, {}).update(fields)
+                elif key.endswith("_removed"):
+                    section = key[:-len("_removed")]
+                    for name in value:
+                        merged.get(section, {}).pop(name, None)
+                    merged[key] = sorted(set(merged.get(key, [])) | set(value))
+                elif isinstance(value, dict):
+                    merged.setdefault(key, {}).update(value)
+                    if f"{key}_removed" in merged:
+                        merged[f"{key}_removed"] = [k for k in merged[f"{key}_removed"] if k not in value]
+                else:
+                    merged[key] = value
+        
+        return {**header, "base_version": client_version, "full": False, **merged}
 
 # Helper functions
 def create_knight(name: str, description: str, player_party: bool, stats: Dict[str, int] = None) -> Character:
@@ -225,8 +721,9 @@ def create_new_game(session_id: str, character_name: str, description: str) -> G
             "current_location": "Starting Area", 
             "discovered_areas": [],
             "position": {"q": 0, "r": 0},  # Starting hex position
-            "hexes": {"0,0": starting_hex.to_dict()}  # Initialize with starting hex
+            "world_seed": random.getrandbits(32),  # Terrain is generated from this (game/world_gen.py)
         },
+        hex_map=HexMap([starting_hex]),  # Initialize with starting hex
         game_data={"turn_count": 0, "active_events": []}
     )
     
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled PromptTemplate.render vs the old str.replace loop
+"""
+import sys
+import timeit
+from pathlib import Path
+
+# Make backend modules importable
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from game.ollama_client import OllamaClient, PromptTemplate
+
+def legacy_render(template, **kwargs):
+    """The original implementation: one full-string replace per variable"""
+    rendered_user = template.user_template
+    for var, value in kwargs.items():
+        rendered_user = rendered_user.replace(f"{{{var}}}", str(value))
+    return template.system_prompt, rendered_user
+
+CONTEXT = "\n".join([
+    "Character: Sir Pluto",
+    "Stats: vigour:12, clarity:9, spirit:14, guard:4",
+    "Inventory: basic gear, rope, lantern, dried meat",
+    "Location: The Drowned Bastion",
+    "Recent: explore → talk to the ferryman → rest",
+])
+
+CASES = {
+    "gamemaster": dict(game_state=CONTEXT, player_action="I light the lantern and descend", player_intent="explore"),
+    "action_interpreter": dict(situation=CONTEXT, player_input="I light the lantern and descend"),
+    "world_builder": dict(location_type="mysterious location", context=CONTEXT),
+}
+
+# Many-slot template: the legacy loop rescans the whole string once per variable
+WIDE_VARIABLES = [f"field_{i}" for i in range(12)]
+WIDE_TEMPLATE = PromptTemplate(
+    name="wide",
+    system_prompt="",
+    user_template="\n".join(f"{name.upper()}: {{{name}}}" for name in WIDE_VARIABLES) * 4,
+    variables=WIDE_VARIABLES
+)
+
+def main():
+    client = OllamaClient()
+    client.add_template(WIDE_TEMPLATE)
+    CASES["wide"] = {name: f"value of {name}" for name in WIDE_VARIABLES}
+    number = 50000
+    
+    print("🧪 PromptTemplate.render benchmark")
+    print(f"{'template':<20} {'legacy µs':>10} {'compiled µs':>12} {'speedup':>8}")
+    for name, kwargs in CASES.items():
+        template = client.get_template(name)
+        assert template.render(**kwargs)[1] == legacy_render(template, **kwargs)[1], f"{name}: outputs differ"
+        
+        legacy = min(timeit.repeat(lambda: legacy_render(template, **kwargs), number=number, repeat=5))
+        compiled = min(timeit.repeat(lambda: template.render(**kwargs), number=number, repeat=5))
+        legacy_us = legacy / number * 1e6
+        compiled_us = compiled / number * 1e6
+        print(f"{name:<20} {legacy_us:>10.2f} {compiled_us:>12.2f} {legacy_us / compiled_us:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
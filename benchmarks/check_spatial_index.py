@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Check: SpatialIndex queries equal a brute-force scan over every feature
+
+Scatters 20k landmarks, omens and NPCs (with removals, moves and cleared
+hexes mixed in), then compares in_range, in_ring, at and nearest, with and
+without kind filters and max_radius, against a plain list scan. Also reports
+the time per query for both.
+"""
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+# Make backend modules importable
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from models import HEX_FEATURES, Feature, SpatialIndex, hex_distance
+
+SEED = 24
+FEATURES = 20_000
+SPREAD = 400  # Features land in [-SPREAD, SPREAD) on both axes
+QUERIES = 500
+KINDS = ["landmark", "omen", "npc"]
+KIND_FILTERS = [None, "npc", ("landmark", "omen")]
+
+def brute_range(features, q, r, radius, kinds):
+    found = [(hex_distance((q, r), (f.q, f.r)), f) for f in features
+             if (kinds is None or f.kind in kinds) and hex_distance((q, r), (f.q, f.r)) <= radius]
+    return [f for _, f in sorted(found)]
+
+def brute_nearest(features, q, r, kinds, max_radius):
+    limit = math.inf if max_radius is None else max_radius
+    found = [(hex_distance((q, r), (f.q, f.r)), f) for f in features
+             if (kinds is None or f.kind in kinds) and hex_distance((q, r), (f.q, f.r)) <= limit]
+    return min(found)[1] if found else None
+
+def populate(rng):
+    """Build the index and the reference set through the same edits"""
+    index = SpatialIndex()
+    features = set()
+    for i in range(FEATURES):
+        kind = rng.choice(KINDS)
+        feature = Feature(kind, f"{kind} {i % 500}", rng.randrange(-SPREAD, SPREAD), rng.randrange(-SPREAD, SPREAD))
+        index.add(*feature)
+        features.add(feature)
+
+    for feature in rng.sample(sorted(features), FEATURES // 10):
+        index.remove(feature.kind, feature.name, feature.q, feature.r)
+        features.discard(feature)
+        if feature.kind == "npc":  # NPCs move rather than vanish
+            moved = feature._replace(q=feature.q + rng.randint(-5, 5), r=feature.r + rng.randint(-5, 5))
+            index.add(*moved)
+            features.add(moved)
+
+    cleared = {(f.q, f.r) for f in rng.sample(sorted(features), FEATURES // 20)}
+    for q, r in cleared:
+        index.clear_hex(q, r, HEX_FEATURES)
+    features = {f for f in features if (f.q, f.r) not in cleared or f.kind not in HEX_FEATURES}
+
+    assert len(index) == len(features), f"index holds {len(index)} features, expected {len(features)}"
+    return index, sorted(features)
+
+def main():
+    rng = random.Random(SEED)
+    index, features = populate(rng)
+    index_time = brute_time = 0.0
+
+    for _ in range(QUERIES):
+        q, r = rng.randrange(-SPREAD - 50, SPREAD + 50), rng.randrange(-SPREAD - 50, SPREAD + 50)
+        radius = rng.choice([0, 1, 3, 6, 12])
+        kinds = rng.choice(KIND_FILTERS)
+        kind_set = None if kinds is None else ({kinds} if isinstance(kinds, str) else set(kinds))
+        max_radius = rng.choice([None, None, 5, 20])
+
+        start = time.perf_counter()
+        in_range = index.in_range(q, r, radius, kinds)
+        in_ring = index.in_ring(q, r, radius, kinds)
+        at = index.at(q, r, kinds)
+        nearest = index.nearest(q, r, kinds, max_radius)
+        index_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected_range = brute_range(features, q, r, radius, kind_set)
+        expected_nearest = brute_nearest(features, q, r, kind_set, max_radius)
+        brute_time += time.perf_counter() - start
+
+        where = f"({q},{r}) radius={radius} kinds={kinds} max_radius={max_radius}"
+        assert in_range == expected_range, f"in_range differs at {where}"
+        assert in_ring == [f for f in expected_range if hex_distance((q, r), (f.q, f.r)) == radius], \
+            f"in_ring differs at {where}"
+        assert at == [f for f in expected_range if (f.q, f.r) == (q, r)], f"at differs at {where}"
+        assert nearest == expected_nearest, f"nearest differs at {where}: {nearest} != {expected_nearest}"
+
+    print(f"✅ {QUERIES} mixed queries over {len(features):,} features match brute force")
+    print(f"   index: {index_time / QUERIES * 1e6:,.1f} µs/query   "
+          f"brute force: {brute_time / QUERIES * 1e6:,.1f} µs/query")
+
+if __name__ == "__main__":
+    main()
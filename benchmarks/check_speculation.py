@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Check: a turn served from a speculative narration behaves like a fresh one
+
+Starts mock_ollama.py, then for an option narrated by world_builder and one
+narrated by the conversational gamemaster: speculates the option, waits for
+it, and plays it as the next turn. The turn must be a speculation hit, make
+no new model call for its narration, return the speculated text, and (for
+gamemaster) leave that exchange in the session's chat history.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+MOCK_PORT = 11479
+os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{MOCK_PORT}"
+
+# Make backend modules importable
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "backend"))
+
+from game.flow_controller import GameFlowController, speculations
+from game.ollama_client import ollama
+
+# (option the player picks, template that narrates it)
+CASES = [("explore", "world_builder"), ("pray", "gamemaster")]
+
+async def wait_for_mock(deadline: float = 15.0):
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        for _ in range(int(deadline / 0.2)):
+            try:
+                if (await client.get(f"{os.environ['OLLAMA_BASE_URL']}/api/tags")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("mock_ollama.py did not come up")
+
+def calls_to(template_name: str) -> int:
+    return sum(1 for record in ollama.call_log if record["template"] == template_name)
+
+async def check():
+    await wait_for_mock()
+    controller = GameFlowController(None)
+    controller.classifier.add_phrase("pray", "pray")  # No handler: narrated by gamemaster
+    session_id = controller.create_session("Sir Check")
+    game_state = controller.get_session(session_id)
+
+    for option, template_name in CASES:
+        controller._schedule_speculation(game_state, [option])
+        await asyncio.gather(*(task for task in controller._speculative_tasks[session_id].values() if task))
+        hits = speculations.samples().get(("hit",), 0)
+        calls = calls_to(template_name)
+
+        response = await controller.process_action(session_id, option)
+
+        assert "error" not in response, f"'{option}' failed: {response['error']}"
+        assert speculations.samples().get(("hit",), 0) == hits + 1, f"'{option}' was not a speculation hit"
+        assert calls_to(template_name) == calls, f"'{option}' called {template_name} again"
+        history = ollama._conversations.get(f"{session_id}:{template_name}", [])
+        if ollama.get_template(template_name).conversational:
+            assert history and history[-1]["content"] == response["narrative"], \
+                f"'{option}' did not record the {template_name} exchange"
+        print(f"✅ '{option}' ({template_name}): served from speculation, "
+              f"{len(response['narrative'])} chars, {len(history)} chat messages kept")
+
+    await ollama.aclose()
+
+def main():
+    mock = subprocess.Popen([sys.executable, str(ROOT / "benchmarks" / "mock_ollama.py"),
+                             "--port", str(MOCK_PORT), "--latency", "fixed:5", "--tokens-per-sec", "2000"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(check())
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
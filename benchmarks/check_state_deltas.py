@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Check: patching per-turn deltas into a client copy reproduces the full snapshot
+
+Plays random turns (moves, new and changed hexes, stat changes, world_data
+and game_data keys added and removed, history entries, party changes) and
+keeps clients that sync every turn, every few turns, or rarely. Each client
+applies GameState.delta_since exactly like frontend/game.js applyStateUpdate;
+after every turn its copy must equal a fresh full snapshot.
+"""
+import copy
+import json
+import random
+import sys
+from pathlib import Path
+
+# Make backend modules importable
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from models import Hex, create_new_game, create_knight
+
+SEED = 7
+TURNS = 400
+CLIENT_LAGS = [1, 2, 5, 40]  # A client syncs every N turns (40 > DELTA_WINDOW forces full snapshots)
+
+def wire(payload):
+    """What the browser receives (JSON turns int keys into strings)"""
+    return json.loads(json.dumps(payload))
+
+def apply_update(state, update):
+    """Python port of applyStateUpdate in frontend/game.js"""
+    update = dict(update)
+    version, epoch, full = update.pop("version"), update.pop("state_epoch"), update.pop("full")
+    update.pop("base_version", None)
+    if full:
+        return update, version, epoch, True
+
+    state = copy.deepcopy(state)
+    world_data = state.setdefault("world_data", {})
+    world_data.setdefault("hexes", {}).update(update.get("hexes", {}))
+    world_data.update(update.get("world_data", {}))
+    state.setdefault("game_data", {}).update(update.get("game_data", {}))
+    for key in update.get("world_data_removed", []):
+        world_data.pop(key, None)
+    for key in update.get("game_data_removed", []):
+        state["game_data"].pop(key, None)
+
+    characters = state.setdefault("characters", [])
+    for index, fields in update.get("characters", {}).items():
+        index = int(index)
+        while len(characters) <= index:
+            characters.append(None)
+        characters[index] = {**(characters[index] or {}), **fields}
+    if "character_count" in update:
+        del characters[update["character_count"]:]
+
+    state["history"] = (state.get("history", []) + update.get("history", []))[-10:]
+    return state, version, epoch, False
+
+def play_turn(game_state, rng, turn):
+    """Random mutations of the kinds real handlers make"""
+    q, r = game_state.get_current_position()
+    if rng.random() < 0.5:
+        q, r = q + rng.choice([-1, 0, 1]), r + rng.choice([-1, 0, 1])
+        game_state.set_position(q, r)
+    if rng.random() < 0.6:
+        game_state.set_hex(Hex(q, r, rng.choice(["plains", "forest", "marsh", "hills"]), explored=True))
+    if rng.random() < 0.3 and len(game_state.hex_map):
+        old = rng.choice(list(game_state.hex_map))
+        old.explored = not old.explored
+        game_state.hex_map.mark_dirty(old.q, old.r)
+
+    main = game_state.get_main_character()
+    main.vigour = max(0, main.vigour + rng.choice([-2, -1, 1]))
+    if rng.random() < 0.2:
+        main.inventory.append(f"trinket {turn}")
+    if rng.random() < 0.1:
+        game_state.characters.append(create_knight(f"Squire {turn}", "", player_party=True))
+    elif rng.random() < 0.1 and len(game_state.characters) > 1:
+        game_state.characters.pop()
+
+    key = f"rumour_{rng.randrange(6)}"
+    if rng.random() < 0.5:
+        game_state.world_data[key] = f"heard on turn {turn}"
+    else:
+        game_state.world_data.pop(key, None)
+    game_state.game_data["turn_count"] = turn
+    if rng.random() < 0.3:
+        game_state.game_data.pop("weather", None)
+    else:
+        game_state.game_data["weather"] = rng.choice(["rain", "fog", "clear"])
+
+    for _ in range(rng.choice([0, 1, 1, 2])):
+        game_state.add_history_entry(f"action {turn}", f"result {turn}", {"intent": "explore"})
+    game_state.commit_version()
+
+def main():
+    rng = random.Random(SEED)
+    game_state = create_new_game("delta-check", "Sir Check", description="")
+    game_state.commit_version()
+
+    clients = {lag: apply_update({}, wire(game_state.delta_since(None)))[:3] for lag in CLIENT_LAGS}
+    updates = {lag: {"delta": 0, "full": 0} for lag in CLIENT_LAGS}
+
+    for turn in range(1, TURNS + 1):
+        play_turn(game_state, rng, turn)
+        expected = wire(game_state.delta_since(None))
+        for key in ("version", "state_epoch", "full"):
+            expected.pop(key)
+        for lag in CLIENT_LAGS:
+            if turn % lag:
+                continue
+            state, version, epoch = clients[lag]
+            state, version, epoch, full = apply_update(state, wire(game_state.delta_since(version, epoch)))
+            clients[lag] = (state, version, epoch)
+            updates[lag]["full" if full else "delta"] += 1
+            assert state == expected, f"turn {turn}, client syncing every {lag}: patched state differs"
+
+    print(f"✅ {TURNS} turns: patched client state equals the full snapshot")
+    for lag in CLIENT_LAGS:
+        print(f"   every {lag:>2} turns: {updates[lag]['delta']:>3} deltas, {updates[lag]['full']:>3} full snapshots")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Check: incremental field of view equals a full recompute at every step
+
+Walks a party 400 steps across generated terrain (mostly one-hex moves, with
+the odd jump and a hex whose landscape changes under it), updating one
+VisibilityEngine incrementally and recomputing from scratch on another. The
+visible sets must match after every step; time per step is reported for both.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+# Make backend modules importable
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from models import Hex, HexMap, create_new_game
+from game.visibility import VisibilityEngine
+from game.world_gen import world_generator
+
+SEED = 25
+WORLD_SEED = 4242
+STEPS = 400
+JUMP_CHANCE = 0.03  # Teleport a few hexes away (forces a full window rebuild)
+TERRAIN_CHANCE = 0.03  # Change a nearby hex's landscape (invalidates the window)
+
+def main():
+    rng = random.Random(SEED)
+    game_state = create_new_game("visibility-check", "Sir Check", description="")
+    game_state.world_data["world_seed"] = WORLD_SEED
+    seed = world_generator.seed_for(game_state)
+
+    incremental, full = VisibilityEngine(), VisibilityEngine()
+    incremental_time = full_time = 0.0
+    incremental.field_of_view(game_state)
+
+    for step in range(STEPS):
+        q, r = game_state.get_current_position()
+        if rng.random() < JUMP_CHANCE:
+            q, r = q + rng.randint(-6, 6), r + rng.randint(-6, 6)
+        else:
+            q, r = rng.choice(HexMap.neighbours(q, r))
+        game_state.set_position(q, r)
+
+        if rng.random() < TERRAIN_CHANCE:
+            tq, tr = rng.choice(HexMap.range(q, r, 2))
+            current = game_state.get_hex(tq, tr) or world_generator.hex_at(seed, tq, tr)
+            landscape = rng.choice([name for name in ("plains", "forest", "hills", "peaks")
+                                    if name != current.landscape])
+            game_state.set_hex(Hex(tq, tr, landscape))
+
+        for coords in HexMap.range(q, r, 6):  # Warm terrain chunks so neither side pays for generation
+            world_generator.hex_at(seed, *coords)
+
+        start = time.perf_counter()
+        seen = set(incremental.field_of_view(game_state))
+        incremental_time += time.perf_counter() - start
+
+        full.forget(game_state.session_id)
+        start = time.perf_counter()
+        expected = full.field_of_view(game_state)
+        full_time += time.perf_counter() - start
+
+        assert seen == expected, (f"step {step} at ({q},{r}): incremental view differs by "
+                                  f"{sorted(seen ^ expected)}")
+
+    print(f"✅ {STEPS} steps: incremental field of view equals full recompute")
+    print(f"   incremental: {incremental_time / STEPS * 1e6:,.1f} µs/step   "
+          f"full: {full_time / STEPS * 1e6:,.1f} µs/step   "
+          f"speedup: {full_time / incremental_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
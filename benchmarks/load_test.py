@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Load generator: N concurrent simulated players against /api/v1/input
+
+Each player has its own session and plays a scripted loop of actions, sending
+since_version/state_epoch like the frontend so the server answers with deltas.
+Reports throughput, latency percentiles, errors and server memory per session
+(from /api/v1/stats).
+
+Against a running backend:
+    python benchmarks/load_test.py --url http://localhost:8000 --players 20 --turns 10
+
+Self-contained (starts mock_ollama.py and a backend on a scratch database):
+    python benchmarks/load_test.py --spawn --players 50 --turns 5 -- --tokens-per-sec 60
+Arguments after `--` are passed to mock_ollama.py.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+
+SCRIPT = [
+    "look around",
+    "I search the ruins for anything useful",
+    "move north",
+    "talk to the nearest traveller",
+    "I make camp and rest",
+    "move east",
+    "I climb the hill to get a better view",
+    "examine the strange stones",
+]
+
+# Scripted moves are sent as coordinates ("move to q,r"), one hex from where the player stands
+MOVES = {"move north": (0, -1), "move east": (1, 0)}
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+class Player:
+    """One simulated player: its own session, playing the script in a loop"""
+
+    def __init__(self, index: int, client: httpx.AsyncClient, think_time: float):
+        self.session_id = f"load-{index}-{uuid.uuid4().hex[:8]}"
+        self.client = client
+        self.think_time = think_time
+        self.version = None
+        self.epoch = None
+        self.position = (0, 0)
+        self.latencies = []
+        self.errors = 0
+
+    async def play(self, turns: int, offset: int):
+        for turn in range(turns):
+            action = SCRIPT[(offset + turn) % len(SCRIPT)]
+            target = None
+            if action in MOVES:
+                target = tuple(a + b for a, b in zip(self.position, MOVES[action]))
+                action = f"move to {target[0]},{target[1]}"
+            payload = {
+                "input": action,
+                "session_id": self.session_id,
+                "since_version": self.version,
+                "state_epoch": self.epoch,
+            }
+            start = time.perf_counter()
+            try:
+                response = await self.client.post("/api/v1/input", json=payload)
+                response.raise_for_status()
+                body = response.json()
+                if "error" in body:  # Turns the game rejected still come back as 200
+                    self.errors += 1
+                else:
+                    state = body.get("game_state") or {}
+                    self.version = state.get("version", self.version)
+                    self.epoch = state.get("state_epoch", self.epoch)
+                    self.position = target or self.position
+                    self.latencies.append(time.perf_counter() - start)
+            except (httpx.HTTPError, ValueError):
+                self.errors += 1
+            if self.think_time:
+                await asyncio.sleep(self.think_time)
+
+async def server_process_stats(client: httpx.AsyncClient) -> dict:
+    try:
+        response = await client.get("/api/v1/stats")
+        response.raise_for_status()
+        return response.json().get("process", {})
+    except (httpx.HTTPError, ValueError):
+        return {}
+
+async def run(url: str, players: int, turns: int, think_time: float, timeout: float) -> dict:
+    limits = httpx.Limits(max_connections=players + 4, max_keepalive_connections=players + 4)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        before = await server_process_stats(client)
+        crowd = [Player(i, client, think_time) for i in range(players)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(player.play(turns, offset=i) for i, player in enumerate(crowd)))
+        elapsed = time.perf_counter() - start
+
+        after = await server_process_stats(client)
+
+    latencies = [latency for player in crowd for latency in player.latencies]
+    report = {
+        "players": players,
+        "turns": len(latencies),
+        "errors": sum(player.errors for player in crowd),
+        "elapsed_s": elapsed,
+        "throughput_turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {name: percentile(latencies, fraction) * 1000
+                       for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+    }
+    if before.get("rss_bytes") and after.get("rss_bytes"):
+        new_sessions = max(1, after.get("active_sessions", 0) - before.get("active_sessions", 0))
+        report["server_rss_mb"] = after["rss_bytes"] / 2**20
+        report["rss_per_session_kb"] = (after["rss_bytes"] - before["rss_bytes"]) / new_sessions / 1024
+    return report
+
+def print_report(report: dict):
+    print(f"\n🏋️  {report['players']} players, {report['turns']} turns in {report['elapsed_s']:.1f}s "
+          f"({report['errors']} errors)")
+    print(f"   throughput: {report['throughput_turns_per_s']:.2f} turns/s")
+    print("   latency:    " + "  ".join(f"{k}={v:.0f}ms" for k, v in report["latency_ms"].items()))
+    if "server_rss_mb" in report:
+        print(f"   server RSS: {report['server_rss_mb']:.1f} MB "
+              f"(~{report['rss_per_session_kb']:.1f} KB per new session)")
+
+async def wait_until_up(url: str, path: str, deadline: float = 30.0):
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        end = time.monotonic() + deadline
+        while time.monotonic() < end:
+            try:
+                if (await client.get(path)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url}{path} did not come up within {deadline:.0f}s")
+
+def spawn_stack(backend_port: int, mock_port: int, mock_args: list, workdir: str) -> list:
+    """Start mock_ollama.py and a backend that talks to it, on a scratch database"""
+    mock = subprocess.Popen([sys.executable, str(ROOT / "benchmarks" / "mock_ollama.py"),
+                             "--port", str(mock_port), *mock_args])
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{mock_port}",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+        "PYTHONPATH": os.pathsep.join([str(ROOT), str(ROOT / "backend")]),
+    }
+    backend = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(backend_port),
+                                "--log-level", "warning"], cwd=ROOT / "backend", env=env)
+    return [backend, mock]
+
+async def main_async(args, mock_args):
+    processes = []
+    url = args.url
+    try:
+        if args.spawn:
+            workdir = tempfile.mkdtemp(prefix="livinglands-load-")
+            processes = spawn_stack(args.backend_port, args.mock_port, mock_args, workdir)
+            url = f"http://127.0.0.1:{args.backend_port}"
+            await wait_until_up(f"http://127.0.0.1:{args.mock_port}", "/api/tags")
+            await wait_until_up(url, "/api/v1/stats")
+
+        report = await run(url, args.players, args.turns, args.think_time, args.timeout)
+        print_report(report)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+def main():
+    argv = sys.argv[1:]
+    mock_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, mock_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL (ignored with --spawn)")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=5, help="Turns per player")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a player waits between turns")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--spawn", action="store_true", help="Start mock_ollama.py and a backend first")
+    parser.add_argument("--backend-port", type=int, default=8765)
+    parser.add_argument("--mock-port", type=int, default=11435)
+    args = parser.parse_args(argv)
+
+    asyncio.run(main_async(args, mock_args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama server for benchmarking without a model
+
+Serves /api/tags, /api/chat and /api/generate (streaming and not) with
+simulated timings: a per-request latency drawn from a distribution, prompt
+evaluation at a fixed tokens/sec rate and generation at another. Like Ollama,
+only --num-parallel requests are processed at once; the rest queue. Replies
+honour options.num_predict and, when a JSON schema is sent as `format`, are
+valid JSON of that shape.
+
+    python benchmarks/mock_ollama.py --port 11434 --tokens-per-sec 40 --latency lognormal:80:40
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = ("the mist parts and a ruined tower leans over the road while crows circle "
+         "a knight's banner hangs torn from an old oak and somewhere a bell tolls").split()
+
+class Simulator:
+    """Timing model shared by all endpoints"""
+
+    def __init__(self, args):
+        self.models = args.models
+        self.latency = args.latency
+        self.prompt_rate = args.prompt_tokens_per_sec
+        self.token_rate = args.tokens_per_sec
+        self.reply_tokens = args.reply_tokens
+        self.fail_rate = args.fail_rate
+        self.slots = asyncio.Semaphore(args.num_parallel)
+        self.rng = random.Random(args.seed)
+
+    def base_latency(self) -> float:
+        """Seconds of fixed overhead for one request, from --latency"""
+        kind, *params = self.latency.split(":")
+        mean, spread = (float(p) / 1000 for p in (params + ["0", "0"])[:2])
+        if kind == "fixed":
+            value = mean
+        elif kind == "uniform":
+            value = self.rng.uniform(mean - spread, mean + spread)
+        elif kind == "normal":
+            value = self.rng.gauss(mean, spread)
+        elif kind == "lognormal":
+            # Parameterised by the distribution's own mean and standard deviation
+            if mean <= 0:
+                return 0.0
+            sigma_sq = math.log(1 + (spread / mean) ** 2)
+            value = self.rng.lognormvariate(math.log(mean) - sigma_sq / 2, math.sqrt(sigma_sq))
+        else:
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        return max(0.0, value)
+
+    def reply_length(self, options: dict) -> int:
+        length = max(1, int(self.rng.gauss(self.reply_tokens, self.reply_tokens / 4)))
+        limit = options.get("num_predict")
+        return min(length, limit) if limit and limit > 0 else length
+
+    def reply_text(self, tokens: int) -> list:
+        start = self.rng.randrange(len(WORDS))
+        return [("" if i == 0 else " ") + WORDS[(start + i) % len(WORDS)] for i in range(tokens)]
+
+    def structured_reply(self, schema: dict) -> str:
+        return json.dumps(_example(schema, schema))
+
+    def stats(self, prompt_tokens: int, eval_tokens: int, load: float, prompt_eval: float, generation: float) -> dict:
+        """Ollama's timing fields (nanoseconds)"""
+        return {
+            "total_duration": int((load + prompt_eval + generation) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int(generation * 1e9),
+        }
+
+def _example(schema: dict, root: dict):
+    """Minimal value matching a JSON schema (enough for pydantic-generated schemas)"""
+    if "$ref" in schema:
+        name = schema["$ref"].rsplit("/", 1)[-1]
+        return _example(root.get("$defs", {}).get(name, {}), root)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: _example(value, root) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return []
+    if kind == "boolean":
+        return False
+    if kind in ("integer", "number"):
+        return 0
+    if "anyOf" in schema:
+        return _example(schema["anyOf"][0], root)
+    return "mock"
+
+def _prompt_tokens(payload: dict) -> int:
+    text = payload.get("prompt", "") + payload.get("system", "")
+    text += "".join(m.get("content", "") for m in payload.get("messages", []))
+    return len(text) // 4 + 1
+
+def create_app(sim: Simulator) -> FastAPI:
+    app = FastAPI(title="Mock Ollama")
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name, "model": name, "size": 0} for name in sim.models]}
+
+    async def complete(payload: dict, chat: bool):
+        model = payload.get("model", "")
+        if sim.models and model not in sim.models and f"{model}:latest" not in sim.models:
+            return JSONResponse({"error": f"model '{model}' not found"}, status_code=404)
+        if sim.rng.random() < sim.fail_rate:
+            return JSONResponse({"error": "simulated failure"}, status_code=500)
+
+        options = payload.get("options") or {}
+        prompt_tokens = _prompt_tokens(payload)
+        schema = payload.get("format")
+        if isinstance(schema, dict):
+            text = sim.structured_reply(schema)
+            pieces = [text]
+            eval_tokens = len(text) // 4 + 1
+        elif schema == "json":
+            pieces = ['{"intent": "mock"}']
+            eval_tokens = 5
+        else:
+            eval_tokens = sim.reply_length(options)
+            pieces = sim.reply_text(eval_tokens)
+
+        def envelope(content: str, done: bool) -> dict:
+            body = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if chat:
+                body["message"] = {"role": "assistant", "content": content}
+            else:
+                body["response"] = content
+            return body
+
+        async def run(emit=None):
+            async with sim.slots:
+                load = sim.base_latency()
+                prompt_eval = prompt_tokens / sim.prompt_rate
+                await asyncio.sleep(load + prompt_eval)
+                start = time.perf_counter()
+                per_piece = (eval_tokens / sim.token_rate) / max(1, len(pieces))
+                for piece in pieces:
+                    await asyncio.sleep(per_piece)
+                    if emit:
+                        await emit(piece)
+                generation = time.perf_counter() - start
+            return sim.stats(prompt_tokens, eval_tokens, load, prompt_eval, generation)
+
+        if not payload.get("stream", True):
+            stats = await run()
+            return {**envelope("".join(pieces), True), **stats, "done_reason": "stop"}
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            stats = await run(lambda piece: queue.put(json.dumps(envelope(piece, False)) + "\n"))
+            await queue.put(json.dumps({**envelope("", True), **stats, "done_reason": "stop"}) + "\n")
+            await queue.put(None)
+
+        async def body():
+            task = asyncio.create_task(produce())
+            try:
+                while (line := await queue.get()) is not None:
+                    yield line
+            finally:
+                task.cancel()
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        return await complete(await request.json(), chat=True)
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        return await complete(await request.json(), chat=False)
+
+    return app
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", nargs="*", default=["tohur:latest"],
+                        help="Models reported by /api/tags; others get 404 (empty list = accept any)")
+    parser.add_argument("--latency", default="lognormal:80:40",
+                        help="Per-request overhead in ms: fixed:MEAN, uniform:MEAN:HALFWIDTH, "
+                             "normal:MEAN:STD or lognormal:MEAN:STD")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=1500.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0, help="Generation speed")
+    parser.add_argument("--reply-tokens", type=int, default=120, help="Mean reply length before num_predict")
+    parser.add_argument("--num-parallel", type=int, default=4, help="Requests processed at once (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = create_app(Simulator(args))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -32,7 +32,14 @@ const GameState = {
     
     // UI state
     terminalHistory: [],
-    activeTab: null
+    activeTab: null,
+    
+    // Server state sync (game_state arrives as deltas against stateVersion)
+    stateVersion: null,
+    stateEpoch: null,
+    
+    // Server-side latency breakdown of the last turn (ms per stage)
+    lastServerTiming: null
 };
 
 // Step 2: API Communication Layer
@@ -45,10 +52,13 @@ const API = {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
-                    input: command
+                    input: command,
+                    since_version: GameState.stateVersion,
+                    state_epoch: GameState.stateEpoch
                 })
             });
             const result = await response.json();
+            API.recordServerTiming(API.parseServerTiming(response.headers.get('Server-Timing')));
             
             // Update session ID if backend returned a new one
             if (result.session_id && result.session_id !== GameState.sessionId) {
@@ -63,6 +73,81 @@ const API = {
         }
     },
     
+    parseServerTiming(header) {
+        // "interpret;dur=12.5, execute;dur=830.1" -> { interpret: 12.5, execute: 830.1 }
+        if (!header) return null;
+        const timing = {};
+        header.split(',').forEach(entry => {
+            const [name, ...params] = entry.trim().split(';');
+            const dur = params.find(p => p.trim().startsWith('dur='));
+            if (name && dur) timing[name] = parseFloat(dur.split('=')[1]);
+        });
+        return timing;
+    },
+    
+    recordServerTiming(timing) {
+        if (!timing) return;
+        GameState.lastServerTiming = timing;
+        console.debug('Server timing (ms):', timing);
+        ModuleManager.broadcast('perf:server-timing', timing);
+    },
+    
+    async sendCommandStream(command, onToken) {
+        // Streaming variant: narrative tokens arrive as server-sent events,
+        // followed by a final 'result' event carrying the normal response
+        try {
+            const response = await fetch(`${this.baseUrl}/input/stream`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    input: command,
+                    since_version: GameState.stateVersion,
+                    state_epoch: GameState.stateEpoch
+                })
+            });
+            if (!response.ok || !response.body) {
+                return { error: `Request failed (${response.status})` };
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let result = { error: 'Stream ended without a result' };
+            
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                
+                // SSE events are separated by a blank line
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const raw = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    if (!raw.startsWith('data: ')) continue;
+                    
+                    const event = JSON.parse(raw.slice(6));
+                    if (event.type === 'token') {
+                        onToken(event.text);
+                    } else if (event.type === 'result') {
+                        delete event.type;
+                        API.recordServerTiming(event.server_timing);
+                        delete event.server_timing;
+                        result = event;
+                    }
+                }
+            }
+            
+            if (result.session_id && result.session_id !== GameState.sessionId) {
+                GameState.sessionId = result.session_id;
+            }
+            return result;
+        } catch (error) {
+            console.error('API Error:', error);
+            return { error: 'Connection failed' };
+        }
+    },
+    
     async startSession() {
         try {
             const response = await fetch(`${this.baseUrl}/session/start`, {
@@ -192,8 +277,18 @@ const Game = {
         // Add to history
         GameState.terminalHistory.push({ type: 'input', text: command });
         
-        // Send to API
-        const response = await API.sendCommand(command);
+        // Send to API, typing narrative tokens out as they stream in
+        let streamed = false;
+        const response = await API.sendCommandStream(command, (token) => {
+            if (!streamed) {
+                streamed = true;
+                ModuleManager.broadcast('terminal:stream-start', { style: 'narrative' });
+            }
+            ModuleManager.broadcast('terminal:stream', { text: token });
+        });
+        if (streamed) {
+            ModuleManager.broadcast('terminal:stream-end', {});
+        }
         
         // Process response
         if (response.error) {
@@ -204,19 +299,20 @@ const Game = {
         } else {
             // Update game state
             if (response.game_state) {
-                this.updateState(response.game_state);
+                const serverState = this.applyStateUpdate(response.game_state);
+                this.updateState(serverState);
                 
                 // Update current position from world_data
-                if (response.game_state.world_data && response.game_state.world_data.position) {
+                if (serverState.world_data && serverState.world_data.position) {
                     GameState.currentLocation = {
-                        q: response.game_state.world_data.position.q,
-                        r: response.game_state.world_data.position.r
+                        q: serverState.world_data.position.q,
+                        r: serverState.world_data.position.r
                     };
                 }
             }
             
-            // Display narrative response
-            if (response.narrative) {
+            // Display narrative response (unless it was already streamed)
+            if (response.narrative && !streamed) {
                 ModuleManager.broadcast('terminal:output', {
                     text: response.narrative,
                     style: 'narrative'
@@ -243,6 +339,44 @@ const Game = {
         this.render();
     },
     
+    // Server-side game state as last synced; deltas are patched into it
+    serverState: {},
+    
+    applyStateUpdate(update) {
+        const { version, state_epoch, full, base_version, ...changes } = update;
+        
+        if (full) {
+            this.serverState = changes;
+        } else {
+            const state = this.serverState;
+            state.world_data = state.world_data || {};
+            state.world_data.hexes = state.world_data.hexes || {};
+            state.game_data = state.game_data || {};
+            state.characters = state.characters || [];
+            state.history = state.history || [];
+            
+            Object.assign(state.world_data.hexes, changes.hexes || {});
+            Object.assign(state.world_data, changes.world_data || {});
+            Object.assign(state.game_data, changes.game_data || {});
+            (changes.world_data_removed || []).forEach(key => delete state.world_data[key]);
+            (changes.game_data_removed || []).forEach(key => delete state.game_data[key]);
+            
+            Object.entries(changes.characters || {}).forEach(([index, fields]) => {
+                state.characters[index] = { ...(state.characters[index] || {}), ...fields };
+            });
+            if (changes.character_count !== undefined) {
+                state.characters.length = changes.character_count;
+            }
+            
+            // Keep the same 10-entry history window a full snapshot carries
+            state.history = state.history.concat(changes.history || []).slice(-10);
+        }
+        
+        GameState.stateVersion = version;
+        GameState.stateEpoch = state_epoch;
+        return this.serverState;
+    },
+    
     updateState(changes) {
         // Deep merge state changes
         Object.keys(changes).forEach(key => {
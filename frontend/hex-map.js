@@ -29,6 +29,7 @@ const HexMap = {
         zoom: 1,
         hoveredHex: null,
         exploredHexes: new Set(),
+        visibleHexes: null,  // Set of "q,r" the party can see (from world_data.visible), null = unknown
         landmarks: new Map()
     },
     
@@ -166,11 +167,23 @@ const HexMap = {
         }
         
         // Draw fog of war
-        this.drawFogOfWar();
+        this.drawFogOfWar(viewRadius);
     },
     
     // Step 7: Fog of War
-    drawFogOfWar() {
+    drawFogOfWar(viewRadius) {
+        // Server-computed line of sight: shade every hex the party can't see
+        if (this.state.visibleHexes) {
+            for (let q = -viewRadius; q <= viewRadius; q++) {
+                for (let r = -viewRadius; r <= viewRadius; r++) {
+                    if (!this.state.visibleHexes.has(`${q},${r}`)) {
+                        this.drawHex(q, r, this.config.colors.fog, null);
+                    }
+                }
+            }
+            return;
+        }
+        
         const gradient = this.ctx.createRadialGradient(
             this.canvas.width / 2,
             this.canvas.height / 2,
@@ -339,6 +352,11 @@ const HexMap = {
             };
         }
         
+        // Update line of sight
+        if (gameState.world_data.visible) {
+            this.state.visibleHexes = new Set(gameState.world_data.visible.map(([q, r]) => `${q},${r}`));
+        }
+        
         // Update explored hexes
         if (gameState.world_data.hexes) {
             this.state.exploredHexes.clear();
@@ -16,6 +16,7 @@ const Terminal = {
     history: [],
     historyIndex: -1,
     currentAnimation: null,
+    currentStream: null,
     
     // Step 2: Initialization
     init(gameState) {
@@ -115,6 +116,44 @@ const Terminal = {
         this.scrollToBottom();
     },
     
+    // Streaming typewriter: chunks are queued as they arrive and typed out in order
+    startStream(className = '', speed = 20) {
+        if (this.currentAnimation) {
+            this.currentAnimation.cancel = true;
+        }
+        
+        const line = document.createElement('div');
+        line.className = `${className} typing`;
+        this.elements.output.appendChild(line);
+        
+        this.currentStream = { line, pending: '', speed, typing: false };
+    },
+    
+    streamText(chunk) {
+        const stream = this.currentStream;
+        if (!stream) return;
+        
+        stream.pending += chunk;
+        if (!stream.typing) {
+            this.drainStream(stream);
+        }
+    },
+    
+    async drainStream(stream) {
+        stream.typing = true;
+        while (stream.pending.length > 0) {
+            stream.line.textContent += stream.pending[0];
+            stream.pending = stream.pending.substring(1);
+            this.scrollToBottom();
+            await this.delay(stream.speed);
+        }
+        stream.typing = false;
+    },
+    
+    endStream() {
+        this.currentStream = null;
+    },
+    
     async dramaticReveal(lines, pauseBetween = 1000) {
         for (const line of lines) {
             await this.typewriterText(line.text, line.speed || 30, line.className || '');
@@ -149,6 +188,20 @@ const Terminal = {
                 }
                 break;
                 
+            case 'terminal:stream-start': {
+                const format = this.formatText('', data.style);
+                this.startStream(format.className || data.style || '', 20);
+                break;
+            }
+                
+            case 'terminal:stream':
+                this.streamText(data.text);
+                break;
+                
+            case 'terminal:stream-end':
+                this.endStream();
+                break;
+                
             case 'terminal:clear':
                 this.clear();
                 break;